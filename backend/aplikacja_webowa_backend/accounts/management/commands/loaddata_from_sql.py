@@ -1,3 +1,4 @@
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.db import connection
 import os
@@ -74,3 +75,7 @@ class Command(BaseCommand):
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f'Error loading SQL: {str(e)}'))
                 raise
+
+        # import omija zakup, więc tabele pochodne (sprzedane miejsca, rollupy sprzedaży) trzeba odtworzyć
+        call_command('sync_sold_seats', stdout=self.stdout)
+        call_command('rebuild_sales_rollups', stdout=self.stdout)
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 from dotenv import load_dotenv
 from datetime import timedelta
 load_dotenv()
@@ -188,10 +189,63 @@ CLOUDINARY_UPLOAD_PRESET = os.getenv("CLOUDINARY_UPLOAD_PRESET", "")
 CLOUDINARY_ALLOWED_DOMAIN = os.getenv("CLOUDINARY_ALLOWED_DOMAIN", "res.cloudinary.com")
 
 
+# cache (przy kilku procesach gunicorna ustaw wspolny backend, np. redis,
+# inaczej uniewaznienia z komend zarzadzajacych widzi tylko jeden proces)
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        'LOCATION': os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+
+# mapa miejsc seansu (uklad sali i bitmapa sprzedanych miejsc trzymane w cache)
+
+SEAT_MAP_CACHE_TIMEOUT = int(os.getenv("SEAT_MAP_CACHE_TIMEOUT", 30))
+SEAT_LAYOUT_CACHE_TIMEOUT = int(os.getenv("SEAT_LAYOUT_CACHE_TIMEOUT", 300))
+
+# wersja indeksu promocji w cache - gorna granica nieaktualnosci indeksu w innych procesach
+PROMOTION_INDEX_TIMEOUT = int(os.getenv("PROMOTION_INDEX_TIMEOUT", 60))
+
+# cache wycen check-promotion/ w pamieci procesu (liczba wpisow, maksymalny wiek w sekundach)
+QUOTE_CACHE_SIZE = int(os.getenv("QUOTE_CACHE_SIZE", 10000))
+QUOTE_CACHE_TTL = int(os.getenv("QUOTE_CACHE_TTL", 300))
+
+# dzienne snapshoty repertuaru (/api/screenings/day/<data>/): ile dni naprzod odswiezac po zmianie
+# i jak dlugo trzymac w cache wersje snapshotow oraz sam snapshot
+REPERTOIRE_SNAPSHOT_DAYS = int(os.getenv("REPERTOIRE_SNAPSHOT_DAYS", 14))
+REPERTOIRE_SNAPSHOT_TIMEOUT = int(os.getenv("REPERTOIRE_SNAPSHOT_TIMEOUT", 24 * 3600))
+
+# okno dat /api/screenings/list/ bez parametrow (dni od dzisiaj) i najszersze dozwolone okno
+SCREENING_LIST_DAYS = int(os.getenv("SCREENING_LIST_DAYS", 30))
+SCREENING_LIST_MAX_DAYS = int(os.getenv("SCREENING_LIST_MAX_DAYS", 92))
+
+# logi wyceny biletow (tickets.pricing): INFO - decyzja cenowa, DEBUG - slad oceny regul promocji
+PRICING_LOG_LEVEL = os.getenv("PRICING_LOG_LEVEL", "WARNING")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "plain": {"format": "%(asctime)s %(levelname)s %(name)s %(message)s"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "plain"},
+    },
+    "loggers": {
+        "tickets.pricing": {"handlers": ["console"], "level": PRICING_LOG_LEVEL, "propagate": False},
+    },
+}
+
+# czas (w sekundach) tymczasowej blokady miejsc podczas zakupu
+SEAT_HOLD_TTL = int(os.getenv("SEAT_HOLD_TTL", 600))
+
+
 
 # wysylanie emaili
 
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend")
 
 EMAIL_HOST = os.getenv("EMAIL_SERVER_HOST")
 EMAIL_PORT = os.getenv("EMAIL_SERVER_PORT")
@@ -201,4 +255,27 @@ EMAIL_USE_SSL  =  False
 EMAIL_HOST_USER = os.getenv("EMAIL_ADDRESS")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_PASSWORD")
 
-DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
\ No newline at end of file
+DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+# kolejka wysylki biletow (process_ticket_deliveries)
+TICKET_DELIVERY_MAX_ATTEMPTS = int(os.getenv("TICKET_DELIVERY_MAX_ATTEMPTS", 5))
+TICKET_DELIVERY_BACKOFF = int(os.getenv("TICKET_DELIVERY_BACKOFF", 30))
+TICKET_DELIVERY_BACKOFF_MAX = int(os.getenv("TICKET_DELIVERY_BACKOFF_MAX", 3600))
+TICKET_DELIVERY_LEASE = int(os.getenv("TICKET_DELIVERY_LEASE", 300))
+
+# PDF biletow swiezego zamowienia, ktorego jeszcze nie widac: 202 + Retry-After zamiast 404
+TICKET_PDF_PENDING_GRACE = int(os.getenv("TICKET_PDF_PENDING_GRACE", 30))
+TICKET_PDF_RETRY_AFTER = int(os.getenv("TICKET_PDF_RETRY_AFTER", 1))
+
+# silnik PDF biletow: pisa (xhtml2pdf), reportlab, weasyprint
+TICKET_PDF_ENGINE = os.getenv("TICKET_PDF_ENGINE", "pisa")
+
+# zbiorcze generowanie PDF (render_ticket_pdfs, /api/tickets/pdf/batch/); 0 = liczba rdzeni
+TICKET_PDF_BATCH_WORKERS = int(os.getenv("TICKET_PDF_BATCH_WORKERS", 0))
+# gorny limit procesow wspoldzielonej puli - rownolegle zadania admina nie mnoza procesow
+TICKET_PDF_BATCH_MAX_WORKERS = int(os.getenv("TICKET_PDF_BATCH_MAX_WORKERS", 4))
+# tyle zamowien i mniej renderujemy w procesie zadania, bez puli
+TICKET_PDF_BATCH_INLINE_ORDERS = int(os.getenv("TICKET_PDF_BATCH_INLINE_ORDERS", 4))
+TICKET_PDF_BATCH_MAX_ORDERS = int(os.getenv("TICKET_PDF_BATCH_MAX_ORDERS", 2000))
+
+# wyrenderowane PDF biletow (klucz: skrot zawartosci zamowienia i wersji szablonu)
+TICKET_PDF_CACHE_DIR = os.getenv("TICKET_PDF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "ticket_pdf_cache"))
@@ -0,0 +1,100 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Seat
+
+
+def _timeout():
+    return getattr(settings, "SEAT_LAYOUT_CACHE_TIMEOUT", 300)
+
+
+def _version_key(auditorium_id):
+    return f"auditorium:{auditorium_id}:layout_version"
+
+
+def _layout_key(auditorium_id, version):
+    return f"auditorium:{auditorium_id}:layout:{version}"
+
+
+class AuditoriumLayout:
+    """
+    Niezmienny układ miejsc sali zbudowany raz na wersję układu.
+
+    seats    - krotki (seat_id, row_number, seat_number) posortowane po rzędzie i miejscu,
+               pozycja na liście to ordinal miejsca
+    rows     - row_number -> lista krotek (seat_id, seat_number)
+    seat_ids - (row_number, seat_number) -> seat_id
+    ordinals - seat_id -> ordinal
+    """
+
+    __slots__ = ("auditorium_id", "version", "seats", "rows", "seat_ids", "ordinals")
+
+    def __init__(self, auditorium_id, version, seats):
+        self.auditorium_id = auditorium_id
+        self.version = version
+        self.seats = tuple(seats)
+        self.rows = {}
+        self.seat_ids = {}
+        self.ordinals = {}
+        for ordinal, (seat_id, row_number, seat_number) in enumerate(self.seats):
+            self.rows.setdefault(row_number, []).append((seat_id, seat_number))
+            self.seat_ids[(row_number, seat_number)] = seat_id
+            self.ordinals[seat_id] = ordinal
+
+    def __len__(self):
+        return len(self.seats)
+
+    def __getstate__(self):
+        # do cache trafia tylko lista miejsc, słowniki są odtwarzane po odczycie
+        return (self.auditorium_id, self.version, self.seats)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def has_row(self, row_number):
+        return row_number in self.rows
+
+    def resolve(self, row_number, seat_number):
+        return self.seat_ids.get((row_number, seat_number))
+
+
+# układy trzymane w pamięci procesu, ważne dopóki zgadza się wersja z cache
+_layouts = {}
+
+
+def get_layout_version(auditorium_id):
+    key = _version_key(auditorium_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, _timeout())
+        version = cache.get(key)
+    return version
+
+
+def get_layout(auditorium_id):
+    version = get_layout_version(auditorium_id)
+
+    layout = _layouts.get(auditorium_id)
+    if layout is not None and layout.version == version:
+        return layout
+
+    layout = cache.get(_layout_key(auditorium_id, version))
+    if layout is None:
+        seats = (
+            Seat.objects.filter(auditorium_id=auditorium_id)
+            .order_by("row_number", "seat_number")
+            .values_list("id", "row_number", "seat_number")
+        )
+        layout = AuditoriumLayout(auditorium_id, version, seats)
+        cache.set(_layout_key(auditorium_id, version), layout, _timeout())
+
+    _layouts[auditorium_id] = layout
+    return layout
+
+
+def invalidate_layout(auditorium_id):
+    """Nowa wersja układu - poprzednie wpisy w cache przestają być osiągalne."""
+    cache.set(_version_key(auditorium_id), uuid.uuid4().hex, _timeout())
+    _layouts.pop(auditorium_id, None)
@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.db.models import Q
+from auditorium.layout import invalidate_layout
 from auditorium.models import Auditorium, Seat
 
 
@@ -42,6 +43,7 @@ class Command(BaseCommand):
 
             with transaction.atomic():
                 qs.delete()
+            invalidate_layout(aud.id)
             total_deleted += count
             modified.append(f"{aud.name}: deleted {count} zero-indexed seats")
 
@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.db.models import Min
+from auditorium.layout import invalidate_layout
 from auditorium.models import Auditorium, Seat
 
 
@@ -61,6 +62,7 @@ class Command(BaseCommand):
                         seat.seat_number = seat.seat_number + 1
                     seat.save(update_fields=['row_number', 'seat_number'])
 
+            invalidate_layout(aud.id)
             changed_total += count
             modified.append(
                 f"{aud.name}: renumbered {count} seats to 1-based"
@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.db.models import Max
+from auditorium.layout import invalidate_layout
 from auditorium.models import Auditorium, Seat
 
 # Każdy wzorzec to lista: liczba siedzeń w danym rzędzie (row_number zaczyna od 1)
@@ -92,6 +93,7 @@ class Command(BaseCommand):
                                 seat_number=start_seat + i
                             )
                             added += 1
+                invalidate_layout(auditorium.id)
                 created_total += added
                 modified.append(
                     f"{auditorium.name}: added {extend_rows} seats to each of {rows_data.count()} rows (total +{added})"
@@ -122,6 +124,7 @@ class Command(BaseCommand):
                             )
                         remaining -= seats_in_this_row
                         row_index += 1
+                invalidate_layout(auditorium.id)
                 created_total += to_append
                 modified.append(
                     f"{auditorium.name}: appended {to_append} seats in rows of {per_row} (from row {start_row})"
@@ -166,6 +169,7 @@ class Command(BaseCommand):
                             )
                         remaining -= seats_in_this_row
                         row_index += 1
+            invalidate_layout(auditorium.id)
             created_total += sum(pattern) + (to_append if to_append > 0 else 0)
             if to_append > 0:
                 modified.append(
@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.db.models import Max
+from auditorium.layout import invalidate_layout
 from auditorium.models import Auditorium, Seat
 
 
@@ -47,6 +48,7 @@ class Command(BaseCommand):
             with transaction.atomic():
                 to_delete.delete()
 
+            invalidate_layout(auditorium.id)
             deleted_total += count
             modified.append(
                 f"{auditorium.name}: deleted {count} seats (kept rows 0-{keep_rows - 1})"
@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .layout import invalidate_layout
+from .models import Seat
+
+
+@receiver(post_save, sender=Seat)
+@receiver(post_delete, sender=Seat)
+def seat_changed(sender, instance, **kwargs):
+    auditorium_id = instance.auditorium_id
+    transaction.on_commit(lambda: invalidate_layout(auditorium_id))
@@ -27,6 +27,10 @@ class Movie(models.Model):
 
     class Meta:
         ordering = ['-cinema_release_date', 'title']
+        indexes = [
+            # strony filmów na liście seansów (kursor po tytule)
+            models.Index(fields=['title', 'id'], name='movie_title_idx'),
+        ]
         constraints = [
             models.CheckConstraint(
                 check=Q(release_date__lte=F('cinema_release_date')),
@@ -0,0 +1,147 @@
+import hashlib
+import random
+import tracemalloc
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from auditorium.models import Auditorium
+from movies.models import Genre, Movie
+from screenings.models import ProjectionType, Screening
+from screenings.serializers import ScreeningReadSerializer
+from screenings.services.repertoire import grouped_repertoire, iter_repertoire_json
+from tickets.management.commands._bench import rolled_back, timeit
+
+
+def make_repertoire(screenings, rng):
+    """Syntetyczny repertuar: ~70 seansów na film, 20 sal, część filmów bez gatunków lub z tym samym tytułem."""
+    genres = [Genre.objects.create(name=f"bench-genre-{i}-{rng.random():.6f}") for i in range(8)]
+    projection_types = [ProjectionType.objects.create(name=f"bench-pt-{i}-{rng.random():.6f}") for i in range(4)]
+    auditoriums = [Auditorium.objects.create(name=f"bench-hall-{i}-{rng.random():.6f}") for i in range(20)]
+
+    movies = []
+    for i in range(max(1, screenings // 70)):
+        movie = Movie.objects.create(
+            # co dziesiąty tytuł powtórzony - grupowanie idzie po id filmu, nie po tytule
+            title=f"Bench movie {i - i % 10 if i % 10 == 1 else i:04d}",
+            original_title=f"Original {i}",
+            description="Zażółć gęślą jaźń " * 5,
+            release_date=date.today() - timedelta(days=rng.randint(0, 400)),
+            cinema_release_date=date.today(),
+            duration_minutes=rng.randint(80, 180),
+            directors="Reżyser Testowy",
+            poster_path=f"/posters/{i}.jpg",
+            is_special_event=i % 7 == 0,
+        )
+        movie.genres.set(rng.sample(genres, rng.randint(0, 3)))
+        movies.append(movie)
+
+    start = (timezone.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    Screening.objects.bulk_create([
+        Screening(
+            movie=rng.choice(movies),
+            auditorium=auditoriums[n % len(auditoriums)],
+            projection_type=rng.choice(projection_types + [None]),
+            start_time=start + timedelta(minutes=10 * (n // len(auditoriums))),
+            published_at=start - timedelta(days=1),
+        )
+        for n in range(screenings)
+    ], batch_size=2000)
+
+
+def traced(fn):
+    """(wynik, szczyt pamięci w MB) jednego wywołania."""
+    tracemalloc.start()
+    try:
+        result = fn()
+        return result, tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the flat repertoire builder with ScreeningReadSerializer on a synthetic repertoire "
+        "(byte-identical JSON required) and time both; check the streamed list against a one-shot "
+        "render and compare traced memory peaks (data is rolled back)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--screenings', type=int, default=10000, help='Synthetic screenings to create.')
+        parser.add_argument('--iterations', type=int, default=3, help='Timed runs per implementation.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+
+        with rolled_back():
+            make_repertoire(options['screenings'], random.Random(options['seed']))
+            movie_ids = list(Movie.objects.filter(title__startswith="Bench movie").values_list("id", flat=True))
+
+            # ScreeningListView (cały repertuar) i strona ScreeningView (10 filmów)
+            scenarios = {
+                "full list": Screening.objects.order_by('movie__title', 'start_time'),
+                "movie page": Screening.objects.filter(movie_id__in=movie_ids[:10]).order_by(
+                    'movie__title', 'movie_id', 'projection_type__name', 'start_time'
+                ),
+            }
+
+            failures = []
+            for name, qs in scenarios.items():
+                def reference():
+                    return renderer.render(ScreeningReadSerializer(
+                        qs.select_related('movie', 'auditorium', 'projection_type').prefetch_related('movie__genres'),
+                        many=True,
+                    ).data)
+
+                def fast():
+                    return renderer.render(grouped_repertoire(qs))
+
+                expected = reference()
+                with CaptureQueriesContext(connection) as ctx:
+                    actual = fast()
+                if actual != expected:
+                    failures.append(name)
+                    self.stdout.write(self.style.ERROR(
+                        f"{name}: output differs ({len(actual)} vs {len(expected)} bytes)"
+                    ))
+                    continue
+
+                reference_ms = timeit(reference, options['iterations'])
+                fast_ms = timeit(fast, options['iterations'])
+                self.stdout.write(self.style.SUCCESS(
+                    f"{name:>10}: {qs.count()} screenings, {len(actual)} bytes identical, "
+                    f"serializer {reference_ms:8.1f} ms, flat {fast_ms:8.1f} ms "
+                    f"({reference_ms / fast_ms:4.1f}x, {len(ctx.captured_queries)} queries)"
+                ))
+
+            # /screenings/list/ - partiami filmów zamiast całej listy naraz; strumień trafia
+            # tylko do skrótu, więc szczyt pamięci to jedna partia, nie cała odpowiedź
+            qs = Screening.objects.order_by('movie__title', 'movie_id', 'start_time')
+            ordered_ids = list(
+                Movie.objects.filter(id__in=movie_ids).order_by('title', 'id').values_list('id', flat=True)
+            )
+
+            def one_shot():
+                return hashlib.sha256(renderer.render(grouped_repertoire(qs))).hexdigest()
+
+            def streamed():
+                digest = hashlib.sha256()
+                for chunk in iter_repertoire_json(qs, ordered_ids):
+                    digest.update(chunk)
+                return digest.hexdigest()
+
+            (expected, one_shot_mb), (actual, streamed_mb) = traced(one_shot), traced(streamed)
+            line = f"{'stream':>10}: peak one-shot {one_shot_mb:6.1f} MB, streamed {streamed_mb:6.1f} MB"
+            if actual != expected:
+                failures.append("stream")
+                self.stdout.write(self.style.ERROR(f"{line} - output differs"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{line}, identical"))
+
+        if failures:
+            raise CommandError(f"Flat repertoire output differs from the reference: {', '.join(failures)}.")
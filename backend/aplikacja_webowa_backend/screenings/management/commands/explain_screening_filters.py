@@ -0,0 +1,141 @@
+import random
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from movies.models import Movie
+from screenings.filters import ScreeningFilter
+from screenings.models import Screening
+from tickets.management.commands._bench import rolled_back, timeit
+from .bench_repertoire import make_repertoire
+
+TABLE = Screening._meta.db_table
+
+
+def admin_page(params):
+    """Zapytanie strony ScreeningView: filmy z choć jednym seansem spełniającym filtry ScreeningsPage."""
+    screenings = ScreeningFilter(params, queryset=Screening.objects.all()).qs
+    return (
+        Movie.objects.filter(Exists(screenings.filter(movie_id=OuterRef('pk'))))
+        .order_by('title', 'id')
+        .only('id', 'title')[:11]
+    )
+
+
+def cases(sample):
+    """(nazwa, queryset, czy oczekiwany indeks na tabeli seansów) - kombinacje używane przez frontend i walidację."""
+    start = sample.start_time
+    window = {'start_after': start.isoformat(), 'start_before': (start + timedelta(days=7)).isoformat()}
+    day_end = start + timedelta(days=1)
+    auditorium_id = sample.auditorium_id
+    return [
+        # publiczne: /screenings/list/ (okno dat, opcjonalnie movie_id) i dzienny snapshot
+        ("list: date window", Screening.objects.filter(start_time__gte=start, start_time__lt=start + timedelta(days=30)), True),
+        ("list: movie in window", Screening.objects.filter(
+            movie_id=sample.movie_id, start_time__gte=start, start_time__lt=start + timedelta(days=30)
+        ), True),
+        ("day snapshot", Screening.objects.filter(start_time__gte=start, start_time__lt=day_end), True),
+        # panel: ScreeningView z filtrami ScreeningsPage
+        ("admin: start range", admin_page(window), True),
+        ("admin: auditorium + range", admin_page({**window, 'auditorium_id': auditorium_id}), True),
+        ("admin: projection type", admin_page({'projection_type': sample.projection_type.name if sample.projection_type else '2D'}), True),
+        ("admin: genre", admin_page({'genre': 'x'}), True),
+        ("admin: published range", admin_page({
+            'published_after': (start - timedelta(days=1)).isoformat(), 'published_before': start.isoformat(),
+        }), True),
+        # icontains po tytule nie skorzysta z indeksu B-drzewa - tylko informacyjnie
+        ("admin: movie title", admin_page({'movie_title': 'bench'}), False),
+        # ScreeningWriteSerializer.validate
+        ("validate: duplicate", Screening.objects.filter(auditorium_id=auditorium_id, start_time=start), True),
+        ("validate: previous", Screening.objects.filter(
+            auditorium_id=auditorium_id, start_time__lt=start
+        ).order_by('-start_time')[:1], True),
+        ("validate: next", Screening.objects.filter(
+            auditorium_id=auditorium_id, start_time__gt=start
+        ).order_by('start_time')[:1], True),
+    ]
+
+
+# nazwy indeksów w planie: SQLite "USING [COVERING] INDEX x", PostgreSQL "Index [Only] Scan using x" / "Bitmap Index Scan on x"
+PLAN_INDEX = re.compile(r'USING (?:COVERING )?INDEX (\w+)|Index (?:Only )?Scan (?:Backward )?using (\w+)|Bitmap Index Scan on (\w+)')
+
+
+def screening_indexes():
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, TABLE)
+    return {name for name, info in constraints.items() if info['index'] or info['unique']}
+
+
+def indexes_used(plan, names):
+    """Indeksy tabeli seansów w planie (SQLite nazywa indeks ograniczenia UNIQUE sqlite_autoindex_<tabela>_N)."""
+    used = {next(filter(None, match)) for match in PLAN_INDEX.findall(plan)}
+    return sorted(name for name in used if name in names or name.startswith(f'sqlite_autoindex_{TABLE}_'))
+
+
+def full_scan(plan, qs):
+    """Czy plan czyta całą tabelę seansów - pod własną nazwą albo aliasem podzapytania (U0, U1...)."""
+    aliases = [TABLE, *re.findall(rf'"{TABLE}" (U\d+)', str(qs.query))]
+    pattern = r'Seq Scan on {}\b' if connection.vendor == 'postgresql' else r'\bSCAN {}\b(?! USING)'
+    return any(re.search(pattern.format(alias), plan) for alias in aliases)
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the screening queries issued by the frontend filters, the screenings list and "
+        "ScreeningWriteSerializer.validate; report which index each one uses and time it. "
+        "With --screenings, runs on a synthetic repertoire (data is rolled back)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--screenings', type=int, default=0, help='Synthetic screenings to create first.')
+        parser.add_argument('--iterations', type=int, default=5, help='Timed runs per query.')
+        parser.add_argument('--analyze', action='store_true', help='EXPLAIN ANALYZE (PostgreSQL).')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print full plans.')
+        parser.add_argument('--strict', action='store_true', help='Fail when an expected index is not used.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            if options['screenings']:
+                make_repertoire(options['screenings'], random.Random(options['seed']))
+            # statystyki dla planera po dołożeniu danych
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {TABLE}' if connection.vendor == 'postgresql' else 'ANALYZE')
+
+            sample = (
+                Screening.objects.filter(start_time__gte=timezone.now()).select_related('projection_type')
+                .order_by('start_time').first()
+                or Screening.objects.select_related('projection_type').order_by('start_time').first()
+            )
+            if sample is None:
+                raise CommandError("No screenings - pass --screenings to create a synthetic repertoire.")
+
+            names = screening_indexes()
+            explain_options = {'analyze': True} if options['analyze'] and connection.vendor == 'postgresql' else {}
+            self.stdout.write(f"{connection.vendor}, {Screening.objects.count()} screenings, indexes: {', '.join(sorted(names))}")
+
+            missing = []
+            for name, qs, expect_index in cases(sample):
+                plan = qs.explain(**explain_options)
+                used = indexes_used(plan, names)
+                scanned = full_scan(plan, qs)
+                ms = timeit(lambda: list(qs), options['iterations'])
+
+                verdict = ', '.join(used) or '-'
+                if scanned:
+                    verdict += ' + full scan'
+                line = f"{name:<28} {ms:8.2f} ms  {verdict}"
+                if expect_index and (scanned or not used):
+                    missing.append(name)
+                    self.stdout.write(self.style.WARNING(line))
+                else:
+                    self.stdout.write(self.style.SUCCESS(line) if expect_index else line)
+                if options['verbose_plans']:
+                    self.stdout.write(f"    {plan.replace(chr(10), chr(10) + '    ')}")
+
+        if missing and options['strict']:
+            raise CommandError(f"No index used for: {', '.join(missing)}.")
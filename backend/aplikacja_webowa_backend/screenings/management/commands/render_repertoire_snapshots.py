@@ -0,0 +1,38 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from screenings.services.snapshots import get_snapshot, invalidate_all, refresh_days
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-render the daily repertoire snapshots served by /api/screenings/day/<date>/ "
+        "(e.g. after deploy or a cache flush)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.REPERTOIRE_SNAPSHOT_DAYS, help='Days ahead, starting today.'
+        )
+        parser.add_argument('--all', action='store_true', help='Drop every cached snapshot before rendering.')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        days = [today + timedelta(days=n) for n in range(options['days'] + 1)]
+        if options['all']:
+            invalidate_all()
+
+        started = time.perf_counter()
+        refresh_days(days)
+        for day in days:
+            snapshot = get_snapshot(day)
+            self.stdout.write(
+                f"{day.isoformat()}: {len(snapshot.json()):>9} bytes, {len(snapshot.body):>8} gzipped, ETag {snapshot.etag}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {len(days)} day(s) in {(time.perf_counter() - started) * 1000:.0f} ms."
+        ))
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auditorium', '0004_alter_seat_row_number_alter_seat_seat_number'),
+        ('movies', '0007_movie_title_idx'),
+        ('screenings', '0004_screening_chk_start_time_gte_published_at_and_more'),
+    ]
+
+    operations = [
+        # najpierw indeksy złożone, potem usunięcie pojedynczych indeksów FK, które je powielają
+        migrations.AddIndex(
+            model_name='screening',
+            index=models.Index(fields=['auditorium', 'start_time'], name='screening_auditorium_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='screening',
+            index=models.Index(fields=['movie', 'start_time'], name='screening_movie_start_idx'),
+        ),
+        migrations.AlterField(
+            model_name='screening',
+            name='auditorium',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='auditorium.auditorium'),
+        ),
+        migrations.AlterField(
+            model_name='screening',
+            name='movie',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='movies.movie'),
+        ),
+    ]
@@ -11,9 +11,10 @@ class ProjectionType(models.Model):
 
 
 class Screening(models.Model):
-    movie = models.ForeignKey('movies.Movie', on_delete=models.CASCADE)
+    # pojedyncze indeksy FK zastępują indeksy złożone (movie, start_time) i (auditorium, start_time)
+    movie = models.ForeignKey('movies.Movie', on_delete=models.CASCADE, db_index=False)
     start_time = models.DateTimeField()
-    auditorium = models.ForeignKey('auditorium.Auditorium', on_delete=models.CASCADE)
+    auditorium = models.ForeignKey('auditorium.Auditorium', on_delete=models.CASCADE, db_index=False)
     projection_type = models.ForeignKey('ProjectionType', on_delete=models.CASCADE, null=True)
     published_at = models.DateTimeField(null=False, blank=False, default=timezone.now)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -31,6 +32,13 @@ class Screening(models.Model):
                 name='chk_start_time_minute_alignment'
             ),
         ]
+        indexes = [
+            # sąsiednie seanse sali (ScreeningWriteSerializer.validate) i filtr auditorium_id + zakres startu;
+            # unikalne (start_time, auditorium) zaczyna się od czasu, więc tu nie pomaga
+            models.Index(fields=['auditorium', 'start_time'], name='screening_auditorium_start_idx'),
+            # seanse filmu w oknie dat: /screenings/list/?movie_id, Exists w ScreeningView
+            models.Index(fields=['movie', 'start_time'], name='screening_movie_start_idx'),
+        ]
     
     def __str__(self):
         return f"{self.movie.title} at {self.start_time} in {self.auditorium.name}"
\ No newline at end of file
@@ -1,11 +1,13 @@
 from rest_framework import serializers
 from datetime import timedelta
+from django.conf import settings
 from django.utils import timezone
 from movies.serializers import GenreSerializer, MovieReadSerializer
 from auditorium.serializers import AuditoriumReadSerializer
 from movies.models import Movie
 from auditorium.models import Auditorium
 from .models import ProjectionType, Screening
+from .services.repertoire import InvalidCursor, decode_cursor
 
 
 class ProjectionTypeSerializer(serializers.ModelSerializer):
@@ -203,4 +205,29 @@ class ScreeningWriteSerializer(serializers.ModelSerializer):
                                 'Seans nachodzi na poprzedni lub nie pozostawia wystarczającej przerwy przed następnym seansem (wymagany bufor 30 minut).'
                             ]
                         })
-        return attrs
\ No newline at end of file
+        return attrs
+
+class ScreeningListQuerySerializer(serializers.Serializer):
+    """Parametry /screenings/list/ - domyślnie od dziś na SCREENING_LIST_DAYS dni, bez stronicowania."""
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    movie_id = serializers.IntegerField(required=False)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=100)
+    cursor = serializers.CharField(required=False)
+
+    def validate_cursor(self, value):
+        try:
+            return decode_cursor(value)
+        except InvalidCursor:
+            raise serializers.ValidationError("Nieprawidłowy kursor")
+
+    def validate(self, data):
+        data.setdefault("date_from", timezone.localdate())
+        data.setdefault("date_to", data["date_from"] + timedelta(days=settings.SCREENING_LIST_DAYS - 1))
+        if data["date_from"] > data["date_to"]:
+            raise serializers.ValidationError("date_from nie może być późniejsza niż date_to")
+        if (data["date_to"] - data["date_from"]).days >= settings.SCREENING_LIST_MAX_DAYS:
+            raise serializers.ValidationError(
+                f"Zakres dat może obejmować najwyżej {settings.SCREENING_LIST_MAX_DAYS} dni"
+            )
+        return data
@@ -0,0 +1,132 @@
+import base64
+import binascii
+import json
+
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from movies.models import Genre, Movie
+
+# kolejność pól MovieReadSerializer (fields = '__all__'): id, zadeklarowane genres
+# (category nie istnieje na modelu, więc DRF go pomija), pola modelu, daty
+MOVIE_FIELDS = (
+    "id", "title", "original_title", "description", "release_date", "cinema_release_date",
+    "duration_minutes", "directors", "poster_path", "is_special_event", "created_at", "updated_at",
+)
+# strumieniowana lista repertuaru: seanse czytane i serializowane partiami po tyle filmów
+STREAM_MOVIES = 20
+
+SCREENING_FIELDS = (
+    "id", "movie_id", "auditorium_id", "auditorium__name", "projection_type_id", "projection_type__name",
+    "published_at", "start_time", "created_at", "updated_at",
+)
+
+
+def _movies(movie_ids, format_date, format_datetime):
+    """Słowniki filmów w kształcie MovieReadSerializer - dwa zapytania na całą stronę."""
+    genres = {}
+    # to samo złączenie co prefetch_related('movie__genres'), więc ta sama kolejność gatunków
+    for row in Genre.objects.filter(movies__in=movie_ids).values("id", "name", "movies"):
+        genres.setdefault(row["movies"], []).append({"id": row["id"], "name": row["name"]})
+
+    movies = {}
+    for row in Movie.objects.filter(id__in=movie_ids).order_by().values(*MOVIE_FIELDS):
+        movies[row["id"]] = {
+            "id": row["id"],
+            "genres": genres.get(row["id"], []),
+            "title": row["title"],
+            "original_title": row["original_title"],
+            "description": row["description"],
+            "release_date": format_date(row["release_date"]),
+            "cinema_release_date": format_date(row["cinema_release_date"]),
+            "duration_minutes": row["duration_minutes"],
+            "directors": row["directors"],
+            "poster_path": row["poster_path"],
+            "is_special_event": row["is_special_event"],
+            "created_at": format_datetime(row["created_at"]),
+            "updated_at": format_datetime(row["updated_at"]),
+        }
+    return movies
+
+
+def grouped_repertoire(screenings):
+    """
+    To samo co ScreeningReadSerializer(screenings, many=True).data (ScreeningGroupedListSerializer),
+    ale z wierszy .values(): filmy i sale budowane raz i współdzielone, jeden formater dat.
+    `screenings` - queryset seansów z docelową kolejnością; select_related/prefetch nie są potrzebne.
+    """
+    format_datetime = serializers.DateTimeField().to_representation
+    format_date = serializers.DateField().to_representation
+
+    rows = list(screenings.prefetch_related(None).values(*SCREENING_FIELDS))
+    movies = _movies({row["movie_id"] for row in rows}, format_date, format_datetime)
+
+    groups = {}
+    auditoriums = {}
+    for row in rows:
+        group = groups.get(row["movie_id"])
+        if group is None:
+            group = groups[row["movie_id"]] = {"movie": movies[row["movie_id"]], "projection_types": {}}
+
+        projection_type_id = row["projection_type_id"]
+        projection_type = group["projection_types"].get(projection_type_id)
+        if projection_type is None:
+            projection_type = group["projection_types"][projection_type_id] = {
+                "projection_type": row["projection_type__name"],
+                "screenings": [],
+            }
+
+        auditorium = auditoriums.get(row["auditorium_id"])
+        if auditorium is None:
+            auditorium = auditoriums[row["auditorium_id"]] = {"id": row["auditorium_id"], "name": row["auditorium__name"]}
+
+        projection_type["screenings"].append({
+            "id": row["id"],
+            "auditorium": auditorium,
+            "published_at": format_datetime(row["published_at"]),
+            "start_time": format_datetime(row["start_time"]),
+            "created_at": format_datetime(row["created_at"]),
+            "updated_at": format_datetime(row["updated_at"]),
+        })
+
+    return [
+        {"movie": group["movie"], "projection_types": list(group["projection_types"].values())}
+        for group in groups.values()
+    ]
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(title, movie_id):
+    return base64.urlsafe_b64encode(json.dumps([title, movie_id]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        title, movie_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(title), int(movie_id)
+    except (binascii.Error, UnicodeError, ValueError, TypeError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def iter_repertoire_json(screenings, movie_ids, batch=STREAM_MOVIES):
+    """
+    Tablica JSON grup grouped_repertoire dla movie_ids (w podanej kolejności), wysyłana
+    partiami filmów - w pamięci jest naraz tylko jedna partia. Bajty są takie same jak
+    JSONRenderer().render(grouped_repertoire(...)) dla całej listy.
+    """
+    renderer = JSONRenderer()
+    yield b"["
+    separator = b""
+    for offset in range(0, len(movie_ids), batch):
+        page = screenings.filter(movie_id__in=movie_ids[offset:offset + batch]).order_by(
+            'movie__title', 'movie_id', 'start_time'
+        )
+        # "[...]" partii bez nawiasów; pusta partia (filmy bez seansów) nic nie dokłada
+        chunk = renderer.render(grouped_repertoire(page))[1:-1]
+        if chunk:
+            yield separator + chunk
+            separator = b","
+    yield b"]"
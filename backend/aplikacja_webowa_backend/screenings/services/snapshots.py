@@ -0,0 +1,161 @@
+import gzip
+import hashlib
+import threading
+import uuid
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from screenings.models import Screening
+from .repertoire import grouped_repertoire
+
+# wspólna wersja wszystkich snapshotów - zmiana, której nie da się przypisać do dni (np. nazwa gatunku)
+GENERATION_KEY = "repertoire:generation"
+
+
+def _timeout():
+    return getattr(settings, "REPERTOIRE_SNAPSHOT_TIMEOUT", 24 * 3600)
+
+
+def _window():
+    return getattr(settings, "REPERTOIRE_SNAPSHOT_DAYS", 14)
+
+
+def _version_key(day):
+    return f"repertoire:day:{day.isoformat()}:version"
+
+
+def _snapshot_key(day, generation, version):
+    return f"repertoire:day:{day.isoformat()}:{generation}:{version}"
+
+
+class Snapshot:
+    """
+    Repertuar jednego dnia wyrenderowany raz na wersję dnia.
+
+    etag - skrót nieskompresowanego JSON-a, więc ta sama treść po przebudowie daje ten sam ETag
+    body - JSON skompresowany gzipem
+    """
+
+    # silny ETag dotyczy konkretnych bajtów, więc treść skompresowana dostaje własny
+    GZIP_SUFFIX = "-gzip"
+
+    __slots__ = ("etag", "body")
+
+    def __init__(self, etag, body):
+        self.etag = etag
+        self.body = body
+
+    def __getstate__(self):
+        return (self.etag, self.body)
+
+    def __setstate__(self, state):
+        self.etag, self.body = state
+
+    def json(self):
+        return gzip.decompress(self.body)
+
+    def etag_for(self, gzipped):
+        return f'{self.etag[:-1]}{self.GZIP_SUFFIX}"' if gzipped else self.etag
+
+
+def day_screenings(day):
+    """Seanse rozpoczynające się danego dnia (w strefie TIME_ZONE), w kolejności ScreeningListView."""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return (
+        Screening.objects.filter(start_time__gte=start, start_time__lt=start + timedelta(days=1))
+        .order_by('movie__title', 'start_time')
+    )
+
+
+def render_snapshot(day):
+    payload = JSONRenderer().render(grouped_repertoire(day_screenings(day)))
+    # mtime=0 - te same dane dają te same bajty niezależnie od chwili renderowania
+    return Snapshot(f'"{hashlib.sha256(payload).hexdigest()[:32]}"', gzip.compress(payload, mtime=0))
+
+
+def _versions(day):
+    """(generacja, wersja dnia) - oba klucze jednym odczytem, brakujące tworzone przez add()."""
+    keys = (GENERATION_KEY, _version_key(day))
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, uuid.uuid4().hex, _timeout())
+    if len(found) < len(keys):
+        found = cache.get_many(keys)
+    return found.get(GENERATION_KEY), found.get(_version_key(day))
+
+
+def get_snapshot(day):
+    """
+    Snapshot dnia z cache, renderowany przy braku. Wersja jest czytana przed zapytaniem,
+    więc render zaczęty przed zmianą trafia pod starą wersję i nie nadpisze świeżego.
+    """
+    generation, version = _versions(day)
+    key = _snapshot_key(day, generation, version)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = render_snapshot(day)
+        cache.set(key, snapshot, _timeout())
+    return snapshot
+
+
+def refresh_days(days):
+    """
+    Nowa wersja wskazanych dni. Dni z okna REPERTOIRE_SNAPSHOT_DAYS od dziś są od razu
+    renderowane ponownie, starsze i dalsze - dopiero przy pierwszym żądaniu.
+    """
+    days = set(days)
+    if not days:
+        return
+    cache.set_many({_version_key(day): uuid.uuid4().hex for day in days}, _timeout())
+
+    today = timezone.localdate()
+    last = today + timedelta(days=_window())
+    for day in sorted(days):
+        if today <= day <= last:
+            get_snapshot(day)
+
+
+def invalidate_all():
+    """Nowa generacja - wszystkie snapshoty przestają być osiągalne i są renderowane przy żądaniu."""
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, _timeout())
+
+
+def screening_days(queryset):
+    """Dni (w strefie TIME_ZONE), w których są seanse z querysetu - jedno zapytanie DISTINCT."""
+    return {moment.date() for moment in queryset.datetimes('start_time', 'day')}
+
+
+# dni czekające na odświeżenie po zatwierdzeniu transakcji, osobno dla każdego wątku
+_pending = threading.local()
+
+
+def _pending_days():
+    days = getattr(_pending, "days", None)
+    if days is None:
+        days = _pending.days = set()
+    return days
+
+
+def _flush_refresh():
+    """Pierwsze wywołanie po commicie odświeża wszystkie zebrane dni, kolejne nie mają już nic do zrobienia."""
+    days = _pending_days()
+    if days:
+        pending = set(days)
+        days.clear()
+        refresh_days(pending)
+
+
+def schedule_refresh(days):
+    """
+    Odświeża dni po zatwierdzeniu bieżącej transakcji (poza transakcją - od razu).
+    Kaskadowe usunięcie setek seansów renderuje każdy dzień raz. Dni z wycofanej
+    transakcji zostają w zbiorze i odświeżą się przy następnym commicie - nadmiarowo, ale bez szkody.
+    """
+    _pending_days().update(days)
+    transaction.on_commit(_flush_refresh)
@@ -0,0 +1,62 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from auditorium.models import Auditorium
+from movies.models import Genre, Movie
+from .models import ProjectionType, Screening
+from .services.snapshots import invalidate_all, schedule_refresh, screening_days
+
+
+@receiver(pre_save, sender=Screening)
+def remember_screening_day(sender, instance, **kwargs):
+    # przeniesiony seans znika z poprzedniego dnia - ten dzień też trzeba odświeżyć
+    instance._previous_start_time = (
+        Screening.objects.filter(pk=instance.pk).values_list('start_time', flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Screening)
+@receiver(post_delete, sender=Screening)
+def screening_changed(sender, instance, **kwargs):
+    days = {timezone.localdate(instance.start_time)}
+    previous = getattr(instance, '_previous_start_time', None)
+    if previous is not None:
+        days.add(timezone.localdate(previous))
+    schedule_refresh(days)
+
+
+@receiver(post_save, sender=Movie)
+def movie_changed(sender, instance, **kwargs):
+    schedule_refresh(screening_days(Screening.objects.filter(movie_id=instance.pk)))
+
+
+@receiver(post_save, sender=ProjectionType)
+def projection_type_changed(sender, instance, **kwargs):
+    schedule_refresh(screening_days(Screening.objects.filter(projection_type_id=instance.pk)))
+
+
+@receiver(post_save, sender=Auditorium)
+def auditorium_changed(sender, instance, **kwargs):
+    schedule_refresh(screening_days(Screening.objects.filter(auditorium_id=instance.pk)))
+
+
+@receiver(m2m_changed, sender=Movie.genres.through)
+def movie_genres_changed(sender, instance, action, reverse, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # genre.movies.add(...) - zmiana po stronie gatunku, dni nie wyznaczamy
+        transaction.on_commit(invalidate_all)
+    else:
+        schedule_refresh(screening_days(Screening.objects.filter(movie_id=instance.pk)))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def genre_changed(sender, instance, created=False, **kwargs):
+    if created:
+        return
+    transaction.on_commit(invalidate_all)
@@ -1,9 +1,10 @@
 from django.urls import path
-from .views import ScreeningDetailView, ScreeningListView, ScreeningView, ProjectionTypeListView
+from .views import ScreeningDetailView, ScreeningListView, ScreeningView, RepertoireDayView, ProjectionTypeListView
 
 urlpatterns = [
     path('', ScreeningView.as_view(), name='screening-list'),
     path('<int:pk>/', ScreeningDetailView.as_view(), name='screening-detail'),
     path('projection-types/', ProjectionTypeListView.as_view(), name='projection-types-list'),
-    path('list/', ScreeningListView.as_view(), name='screening-list-all')
+    path('list/', ScreeningListView.as_view(), name='screening-list-all'),
+    path('day/<str:day>/', RepertoireDayView.as_view(), name='screening-day'),
 ]
@@ -2,14 +2,32 @@ from django.shortcuts import render, get_object_or_404
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import status
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination
+from django.db.models import Exists, OuterRef, Q
 
 from .models import Screening, ProjectionType
-from .serializers import ScreeningReadSerializer, ScreeningWriteSerializer
+from movies.models import Movie
+from .serializers import ScreeningListQuerySerializer, ScreeningReadSerializer, ScreeningWriteSerializer
 from rest_framework.permissions import IsAdminUser, SAFE_METHODS, AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
 from .filters import ScreeningFilter
+from .services.repertoire import encode_cursor, grouped_repertoire, iter_repertoire_json
 from django.db import IntegrityError
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.utils.urls import replace_query_param
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from .services.snapshots import get_snapshot
+from datetime import date, datetime, time, timedelta
+import re
+
+# jak w GZipMiddleware
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
+
+class MoviePagination(CursorPagination):
+    page_size = 10
+    ordering = ('title', 'id')
 
 
 class ScreeningView(APIView):
@@ -21,31 +39,26 @@ class ScreeningView(APIView):
     
 
     def get(self, request):
-        qs = (
-            Screening.objects.select_related('movie', 'auditorium', 'projection_type')
-            .prefetch_related('movie__genres')
-            .order_by('movie__title', 'start_time')
-            .all()
-        )
-
         filter_backend = DjangoFilterBackend()
-        qs = filter_backend.filter_queryset(request, qs, view=self)
-
-        movie_ids_qs = qs.order_by('movie__title').values_list('movie_id', flat=True).distinct()
-        movie_ids = list(movie_ids_qs)
-
-        paginator = PageNumberPagination()
-        paginator.page_size = 10
+        screenings = filter_backend.filter_queryset(request, Screening.objects.all(), view=self)
 
-        page_movie_ids = paginator.paginate_queryset(movie_ids, request, view=self)
+        # strona filmów mających choć jeden seans spełniający filtry - kursor po (tytuł, id),
+        # więc kolejne strony nie pomijają OFFSET filmów i nie ładują listy wszystkich id
+        movies = Movie.objects.filter(Exists(screenings.filter(movie_id=OuterRef('pk')))).only('id', 'title')
+        paginator = MoviePagination()
+        page_movie_ids = [movie.id for movie in paginator.paginate_queryset(movies, request, view=self)]
 
         page_screenings_qs = (
-            qs.filter(movie_id__in=page_movie_ids)
-            .order_by('movie__title', 'projection_type__name', 'start_time')
+            screenings.filter(movie_id__in=page_movie_ids)
+            .order_by('movie__title', 'movie_id', 'projection_type__name', 'start_time')
         )
 
-        serializer = ScreeningReadSerializer(page_screenings_qs, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        return Response({
+            'count': screenings.order_by().values('movie_id').distinct().count(),
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'results': grouped_repertoire(page_screenings_qs),
+        })
     
 
     def post(self, request):
@@ -64,17 +77,71 @@ class ScreeningListView(APIView):
         return [IsAdminUser()]
 
     def get(self, request):
-        qs = (
-            Screening.objects.select_related('movie', 'auditorium', 'projection_type')
-            .prefetch_related('movie__genres')
-            .order_by('movie__title', 'start_time')
-            .all()
+        serializer = ScreeningListQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        window_start = timezone.make_aware(datetime.combine(params['date_from'], time.min))
+        window_end = timezone.make_aware(datetime.combine(params['date_to'] + timedelta(days=1), time.min))
+        screenings = Screening.objects.filter(start_time__gte=window_start, start_time__lt=window_end)
+        if 'movie_id' in params:
+            screenings = screenings.filter(movie_id=params['movie_id'])
+
+        movies = (
+            Movie.objects.filter(Exists(screenings.filter(movie_id=OuterRef('pk'))))
+            .order_by('title', 'id')
+            .values_list('id', 'title')
         )
-
-        serializer = ScreeningReadSerializer(qs, many=True, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        if 'cursor' in params:
+            title, movie_id = params['cursor']
+            movies = movies.filter(Q(title__gt=title) | Q(title=title, id__gt=movie_id))
+        limit = params.get('limit')
+        movies = list(movies[:limit + 1] if limit else movies)
+
+        # treść zostaje zwykłą tablicą, następna strona idzie w nagłówku Link
+        next_url = None
+        if limit and len(movies) > limit:
+            movies = movies[:limit]
+            next_url = replace_query_param(
+                request.build_absolute_uri(), 'cursor', encode_cursor(movies[-1][1], movies[-1][0])
+            )
+
+        response = StreamingHttpResponse(
+            iter_repertoire_json(screenings, [movie_id for movie_id, _ in movies]),
+            content_type='application/json',
+        )
+        if next_url:
+            response['Link'] = f'<{next_url}>; rel="next"'
+        return response
     
     
+class RepertoireDayView(APIView):
+    """Repertuar jednego dnia bez filtrów - gotowy, skompresowany JSON z cache, z ETag i 304."""
+    permission_classes = [AllowAny]
+
+    def get(self, request, day):
+        try:
+            day = date.fromisoformat(day)
+        except ValueError:
+            return Response({"detail": "Nieprawidłowa data, oczekiwano RRRR-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+
+        snapshot = get_snapshot(day)
+        gzipped = bool(ACCEPTS_GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+        etag = snapshot.etag_for(gzipped)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            if gzipped:
+                response = HttpResponse(snapshot.body, content_type='application/json')
+                response['Content-Encoding'] = 'gzip'
+            else:
+                response = HttpResponse(snapshot.json(), content_type='application/json')
+        response['ETag'] = etag
+        # przeglądarka może trzymać kopię, ale przed użyciem pyta o ETag
+        response['Cache-Control'] = 'no-cache'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
 class ScreeningDetailView(APIView):
     def get_permissions(self):
         if self.request.method in SAFE_METHODS:
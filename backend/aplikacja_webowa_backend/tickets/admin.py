@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Ticket, TicketType, PromotionRule
+from .models import Ticket, TicketType, PromotionRule, TicketDelivery
 from auditorium.models import Seat
 
 @admin.register(Ticket)
@@ -45,3 +45,9 @@ class PromotionRuleAdmin(admin.ModelAdmin):
     )
     list_filter = ('ticket_type', 'screening', 'weekday', 'valid_from', 'valid_to')
     search_fields = ('name',)
+
+@admin.register(TicketDelivery)
+class TicketDeliveryAdmin(admin.ModelAdmin):
+    list_display = ('order_number', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('order_number',)
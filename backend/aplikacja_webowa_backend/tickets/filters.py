@@ -1,6 +1,6 @@
 from django_filters import rest_framework as filters
-from django.db.models import Count
 from .models import Ticket
+from .services.ledger import with_seats_count
 from django.db.models import Q
 
 
@@ -16,7 +16,7 @@ class TicketFilter(filters.FilterSet):
     # Free-text search across movie title or directors
     movie_query = filters.CharFilter(method='filter_movie_query')
 
-    # Seats count via annotation; use method filters
+    # Seats count via the shared seats_count annotation; use method filters
     min_seats = filters.NumberFilter(method='filter_min_seats')
     max_seats = filters.NumberFilter(method='filter_max_seats')
 
@@ -40,16 +40,14 @@ class TicketFilter(filters.FilterSet):
             v = int(value)
         except (TypeError, ValueError):
             return queryset
-        qs = queryset.annotate(seats_count_ann=Count('seats'))
-        return qs.filter(seats_count_ann__gte=v)
+        return with_seats_count(queryset).filter(seats_count__gte=v)
 
     def filter_max_seats(self, queryset, name, value):
         try:
             v = int(value)
         except (TypeError, ValueError):
             return queryset
-        qs = queryset.annotate(seats_count_ann=Count('seats'))
-        return qs.filter(seats_count_ann__lte=v)
+        return with_seats_count(queryset).filter(seats_count__lte=v)
 
     def filter_movie_query(self, queryset, name, value):
         if not value:
@@ -0,0 +1,60 @@
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from auditorium.models import Auditorium, Seat
+from movies.models import Movie
+from screenings.models import Screening
+from tickets.models import TicketType
+
+
+class Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Dane benchmarku żyją tylko w transakcji, która jest na końcu wycofywana."""
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def make_screening(seats=500, per_row=25):
+    suffix = uuid.uuid4().hex[:8]
+    auditorium = Auditorium.objects.create(name=f"bench-{suffix}")
+    Seat.objects.bulk_create([
+        Seat(auditorium=auditorium, row_number=i // per_row + 1, seat_number=i % per_row + 1)
+        for i in range(seats)
+    ])
+    movie = Movie.objects.create(
+        title=f"bench-{suffix}",
+        original_title=f"bench-{suffix}",
+        description="benchmark",
+        release_date=date.today(),
+        cinema_release_date=date.today(),
+        duration_minutes=120,
+        directors="bench",
+        poster_path="",
+    )
+    start = (timezone.now() + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+    return Screening.objects.create(movie=movie, auditorium=auditorium, start_time=start)
+
+
+def make_ticket_type(price="25.00"):
+    return TicketType.objects.create(name=f"bench-{uuid.uuid4().hex[:8]}", price=Decimal(price))
+
+
+def timeit(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1000
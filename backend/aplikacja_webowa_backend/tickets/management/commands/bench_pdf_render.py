@@ -0,0 +1,71 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets.models import Ticket
+from tickets.serializers import InstantPurchaseSerializer
+from tickets.services.pdf_render import RENDERERS, build_ticket_context
+from ._bench import make_screening, make_ticket_type, rolled_back
+from .bench_purchase import make_payload
+
+
+def _order_context(screening, ticket_types, seats):
+    serializer = InstantPurchaseSerializer(data=make_payload(screening, ticket_types, seats))
+    if not serializer.is_valid():
+        raise CommandError(f"Order of {seats} tickets did not validate: {serializer.errors}")
+    order_number = serializer.save()[0].order_number
+    tickets = (
+        Ticket.objects.filter(order_number=order_number)
+        .select_related("screening__movie", "screening__auditorium", "type")
+        .prefetch_related("seats")
+    )
+    return build_ticket_context(tickets, order_number)
+
+
+class Command(BaseCommand):
+    help = "Compare ticket PDF engines: render time, CPU time, peak Python memory and PDF size per ticket count (data is rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--engines', nargs='*', default=list(RENDERERS), help='Engines to compare.')
+        parser.add_argument('--tickets', type=int, nargs='*', default=[1, 10, 50], help='Tickets per order.')
+        parser.add_argument('--iterations', type=int, default=5, help='Renders per engine and order size.')
+
+    def handle(self, *args, **options):
+        engines = []
+        for name in options['engines']:
+            renderer = RENDERERS.get(name)
+            if renderer is None:
+                raise CommandError(f"Unknown engine {name}, available: {', '.join(RENDERERS)}")
+            if not renderer.available():
+                self.stdout.write(self.style.WARNING(f"{name}: not available in this environment, skipped"))
+                continue
+            engines.append(renderer())
+
+        with rolled_back():
+            screening = make_screening(seats=max(options['tickets'] + [500]))
+            ticket_types = [make_ticket_type("25.00"), make_ticket_type("18.00")]
+
+            for count in options['tickets']:
+                # zamówienie wycofujemy od razu, kontekst ma już wczytane bilety i miejsca
+                with rolled_back():
+                    context = _order_context(screening, ticket_types, count)
+                for renderer in engines:
+                    # rozgrzewka: import modułów, rejestracja fontów
+                    renderer.render(context)
+
+                    start, cpu_start = time.perf_counter(), time.process_time()
+                    for _ in range(options['iterations']):
+                        pdf = renderer.render(context)
+                    ms = (time.perf_counter() - start) / options['iterations'] * 1000
+                    cpu_ms = (time.process_time() - cpu_start) / options['iterations'] * 1000
+
+                    tracemalloc.start()
+                    renderer.render(context)
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+
+                    self.stdout.write(
+                        f"{renderer.name:>10} {count:>4} tickets: {ms:9.1f} ms/render, cpu {cpu_ms:9.1f} ms, "
+                        f"peak {peak / 1024:8.0f} KiB, pdf {len(pdf) / 1024:6.0f} KiB"
+                    )
@@ -0,0 +1,87 @@
+from datetime import time, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tickets.models import PromotionRule
+from tickets.services.pricing import quote, quote_basket
+from tickets.services.promotions import invalidate_promotions
+from tickets.services.quote_cache import cached_quote, get_quote_cache
+from ._bench import make_screening, make_ticket_type, rolled_back, timeit
+
+
+def make_rules(count, screening, ticket_types):
+    now = timezone.now()
+    rules = []
+    for i in range(count):
+        rules.append(PromotionRule(
+            name=f"bench-{i}",
+            discount_percent=Decimal(5 + i % 4 * 5),
+            min_tickets=(None, 2, 4)[i % 3],
+            weekday=None if i % 2 else i % 7 + 1,
+            time_from=time(i % 12, 0) if i % 5 == 0 else None,
+            time_to=time(i % 12 + 12, 0) if i % 5 == 0 else None,
+            ticket_type=ticket_types[i % len(ticket_types)] if i % 4 == 0 else None,
+            screening=screening if i % 6 == 0 else None,
+            valid_from=now - timedelta(days=1),
+            valid_to=now + timedelta(days=7),
+        ))
+    PromotionRule.objects.bulk_create(rules)
+
+
+class Command(BaseCommand):
+    help = "Measure single and basket price quotes per second against a synthetic promotion rule set (data is rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rules', type=int, default=200, help='Promotion rules to generate.')
+        parser.add_argument('--quotes', type=int, default=1000, help='Timed quotes per scenario.')
+        parser.add_argument('--basket', type=int, default=10, help='Items per basket in the basket scenario.')
+        parser.add_argument('--min-rate', type=int, default=1000, help='Fail below this many single quotes per second.')
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            screening = make_screening(seats=10)
+            ticket_types = [make_ticket_type("25.00"), make_ticket_type("18.00"), make_ticket_type("15.00")]
+            make_rules(options['rules'], screening, ticket_types)
+            invalidate_promotions()
+
+            basket = [(ticket_types[i % len(ticket_types)], i % 6 + 1) for i in range(options['basket'])]
+            counter = iter(range(10 ** 9))
+
+            def single():
+                n = next(counter)
+                quote(screening, ticket_types[n % len(ticket_types)], n % 8 + 1)
+
+            quote(screening, ticket_types[0], 1)
+            single_ms = timeit(single, options['quotes'])
+            basket_ms = timeit(lambda: quote_basket(screening, basket), options['quotes'])
+
+            # kliknięcia w mapę miejsc: check-promotion/ dla kolejnych liczb miejsc
+            seats_data = [{"row_number": 1, "seat_number": n} for n in range(1, 9)]
+
+            def clicked():
+                n = next(counter)
+                cached_quote(screening.id, ticket_types[n % len(ticket_types)].id, seats_data[:n % 8 + 1])
+
+            cache = get_quote_cache()
+            cache.clear()
+            cached_ms = timeit(clicked, options['quotes'])
+            stats = cache.stats()
+
+            invalidate_promotions()
+
+        rate = 1000 / single_ms
+        line = f"single quote: {single_ms * 1000:8.1f} us, {rate:10.0f} quotes/s"
+        if rate < options['min_rate']:
+            self.stdout.write(self.style.ERROR(line))
+            raise CommandError(f"Pricing below {options['min_rate']} quotes/s.")
+        self.stdout.write(self.style.SUCCESS(line))
+        self.stdout.write(
+            f"basket of {len(basket)}: {basket_ms * 1000:8.1f} us, "
+            f"{1000 / basket_ms * len(basket):10.0f} items/s"
+        )
+        self.stdout.write(
+            f"check-promotion (cached): {cached_ms * 1000:8.1f} us, "
+            f"hits {stats['hits']}, misses {stats['misses']}, size {stats['size']}"
+        )
@@ -0,0 +1,97 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from auditorium.layout import get_layout, invalidate_layout
+from tickets.serializers import InstantPurchaseSerializer
+from tickets.services.sales import record_sales
+from ._bench import make_screening, make_ticket_type, rolled_back, timeit
+
+# screening + typy biletów + sprzedane miejsca + aktywne blokady
+VALIDATE_QUERY_BUDGET = 4
+# promocje + savepoint + ponowny odczyt blokad + bilety + miejsca biletów + sprzedane miejsca
+# + kolejka wysyłki + zwolnienie savepointu
+CREATE_QUERY_BUDGET = 8
+# rollupy sprzedaży: seans, film i sala - po jednym UPDATE na typ biletu w zamówieniu
+# (pierwsza sprzedaż danego typu na seans/dzień dokłada INSERT i drugi UPDATE na rollup)
+ROLLUP_QUERIES_PER_TYPE = 3
+
+
+def make_payload(screening, ticket_types, seats):
+    layout = get_layout(screening.auditorium_id)
+    tickets = []
+    for i, (_, row_number, seat_number) in enumerate(layout.seats[:seats]):
+        tickets.append({
+            "ticket_type_id": ticket_types[i % len(ticket_types)].id,
+            "seats": [{"row_number": row_number, "seat_number": seat_number}],
+            "first_name": "Jan",
+            "last_name": "Kowalski",
+            "email": "jan@example.com",
+        })
+    return {"screening_id": screening.id, "tickets": tickets}
+
+
+class Command(BaseCommand):
+    help = "Measure query counts and timing of purchase validation and order creation per basket size and enforce the query budgets (data is rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='*', default=[1, 10, 50], help='Basket sizes (seats per order).')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed create() runs per basket size.')
+
+    def _validated(self, payload):
+        serializer = InstantPurchaseSerializer(data=payload)
+        if not serializer.is_valid():
+            raise CommandError(f"Basket of {len(payload['tickets'])} seats did not validate: {serializer.errors}")
+        return serializer
+
+    def _save(self, payload):
+        # każde zamówienie we własnym savepoincie, żeby kolejne przebiegi trafiały na wolne miejsca
+        serializer = self._validated(payload)
+        with rolled_back():
+            serializer.save()
+
+    def handle(self, *args, **options):
+        sizes = options['sizes']
+        failures = []
+
+        with rolled_back():
+            screening = make_screening(seats=max(sizes + [500]))
+            ticket_types = [make_ticket_type("25.00"), make_ticket_type("18.00")]
+            get_layout(screening.auditorium_id)
+            # wiersze rollupów już istnieją, jak dla każdej kolejnej sprzedaży na seans
+            record_sales(screening, [(ticket_type.id, 0, Decimal("0")) for ticket_type in ticket_types])
+
+            for size in sizes:
+                payload = make_payload(screening, ticket_types, size)
+                with CaptureQueriesContext(connection) as ctx:
+                    serializer = self._validated(payload)
+                validate_queries = len(ctx.captured_queries)
+
+                with rolled_back():
+                    with CaptureQueriesContext(connection) as ctx:
+                        serializer.save()
+                create_queries = len(ctx.captured_queries)
+
+                create_ms = timeit(lambda: self._save(payload), options['iterations'])
+
+                line = (
+                    f"{size:>4} seats: validate {validate_queries} queries, "
+                    f"create {create_queries} queries, {create_ms:8.3f} ms/order"
+                )
+                types = len({item["ticket_type_id"] for item in payload["tickets"]})
+                create_budget = CREATE_QUERY_BUDGET + ROLLUP_QUERIES_PER_TYPE * types
+                if validate_queries > VALIDATE_QUERY_BUDGET or create_queries > create_budget:
+                    failures.append(line)
+                    self.stdout.write(self.style.ERROR(line))
+                else:
+                    self.stdout.write(self.style.SUCCESS(line))
+
+            invalidate_layout(screening.auditorium_id)
+
+        if failures:
+            raise CommandError(
+                f"Query budget exceeded (validate {VALIDATE_QUERY_BUDGET}, create {CREATE_QUERY_BUDGET} "
+                f"+ {ROLLUP_QUERIES_PER_TYPE} per ticket type)."
+            )
@@ -0,0 +1,79 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+
+from auditorium.models import Seat
+from tickets.models import Ticket
+from auditorium.layout import invalidate_layout
+from tickets.services.availability import build_seat_map, get_sold_bitmap, invalidate_sold_bitmap
+from ._bench import make_screening, make_ticket_type, rolled_back, timeit
+
+
+def legacy_seat_map(screening):
+    # dotychczasowa implementacja ScreeningSeatsView.get
+    seats = Seat.objects.filter(auditorium=screening.auditorium)
+    sold_seat_ids = set(
+        Ticket.objects.filter(screening=screening)
+        .values_list("seats__id", flat=True)
+    )
+    rows = {}
+    for seat in seats:
+        rows.setdefault(seat.row_number, []).append({
+            "id": seat.id,
+            "row_number": seat.row_number,
+            "seat_number": seat.seat_number,
+            "reserved": seat.id in sold_seat_ids,
+        })
+    return rows
+
+
+def same_seat_map(legacy, fast):
+    """Porównanie bez kolejności miejsc w rzędzie; "held" (blokady) nie istnieje w starej ścieżce, a benchmark ich nie tworzy."""
+    def normalized(rows, drop=()):
+        return {
+            row: sorted(({k: v for k, v in seat.items() if k not in drop} for seat in seats), key=lambda x: x["id"])
+            for row, seats in rows.items()
+        }
+
+    if any(seat["held"] for seats in fast.values() for seat in seats):
+        return False
+    return normalized(legacy) == normalized(fast, drop=("held",))
+
+
+class Command(BaseCommand):
+    help = "Compare the legacy seat map query path with the cached seat bitmap (data is rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seats', type=int, default=500, help='Seats in the benchmark auditorium.')
+        parser.add_argument('--sold', type=float, default=0.4, help='Fraction of seats sold before measuring.')
+        parser.add_argument('--iterations', type=int, default=200, help='Requests simulated per variant.')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+
+        with rolled_back():
+            screening = make_screening(seats=options['seats'])
+            ticket_type = make_ticket_type()
+            seats = list(Seat.objects.filter(auditorium=screening.auditorium))
+            sold = random.sample(seats, int(len(seats) * options['sold']))
+            for seat in sold:
+                ticket = Ticket.objects.create(
+                    screening=screening, type=ticket_type, total_price=ticket_type.price
+                )
+                # SoldSeat dopisuje sygnał m2m_changed Ticket.seats
+                ticket.seats.add(seat)
+
+            if not same_seat_map(legacy_seat_map(screening), build_seat_map(screening.id, screening.auditorium_id)):
+                raise CommandError('Seat maps differ between implementations.')
+
+            legacy_ms = timeit(lambda: legacy_seat_map(screening), iterations)
+            fast_ms = timeit(lambda: build_seat_map(screening.id, screening.auditorium_id), iterations)
+            bitmap = get_sold_bitmap(screening.id, screening.auditorium_id)
+            invalidate_sold_bitmap(screening.id)
+            invalidate_layout(screening.auditorium_id)
+
+        self.stdout.write(f"Seats: {len(seats)}, sold: {len(sold)}, iterations: {iterations}")
+        self.stdout.write(f"Legacy ORM path: {legacy_ms:.3f} ms/request")
+        self.stdout.write(f"Bitmap path:     {fast_ms:.3f} ms/request")
+        self.stdout.write(f"Bitmap size:     {len(bitmap.to_bytes())} bytes")
+        self.stdout.write(self.style.SUCCESS(f"Speedup: x{legacy_ms / fast_ms:.1f}"))
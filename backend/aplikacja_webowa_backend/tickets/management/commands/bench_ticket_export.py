@@ -0,0 +1,94 @@
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from auditorium.models import Seat
+from tickets.models import Ticket
+from tickets.services.ledger import EXPORTERS, ledger_rows
+from ._bench import make_screening, make_ticket_type, rolled_back
+
+BATCH = 5000
+
+
+def make_tickets(count, screening, ticket_type):
+    """Syntetyczne bilety po 1-4 miejsca, tworzone partiami, żeby samo przygotowanie nie trzymało wszystkiego w pamięci."""
+    seat_ids = list(Seat.objects.filter(auditorium=screening.auditorium).values_list("id", flat=True))
+    TicketSeat = Ticket.seats.through
+    start = timezone.now() - timedelta(days=30)
+    for offset in range(0, count, BATCH):
+        tickets = [
+            Ticket(
+                screening=screening,
+                type=ticket_type,
+                total_price=ticket_type.price,
+                order_number=f"EXPORT-{i}",
+                first_name="Jan",
+                last_name="Kowalski",
+                email="jan@example.com",
+            )
+            for i in range(offset, min(offset + BATCH, count))
+        ]
+        Ticket.objects.bulk_create(tickets)
+        # auto_now_add nadpisuje datę przy zapisie - rozrzucamy zakupy na kolejne godziny partiami
+        Ticket.objects.filter(id__gte=tickets[0].id, id__lte=tickets[-1].id).update(
+            purchased_at=start + timedelta(hours=offset // BATCH)
+        )
+        TicketSeat.objects.bulk_create([
+            TicketSeat(ticket_id=ticket.id, seat_id=seat_ids[n])
+            for i, ticket in enumerate(tickets)
+            for n in range(i % 4 + 1)
+        ])
+
+
+class Command(BaseCommand):
+    help = (
+        "Export synthetic tickets through the streaming ledger export and fail if the traced "
+        "memory peak exceeds the ceiling (data is rolled back)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=200000, help='Synthetic tickets to export.')
+        parser.add_argument('--formats', nargs='*', default=list(EXPORTERS), choices=list(EXPORTERS))
+        parser.add_argument('--max-memory-mb', type=float, default=16, help='Traced memory ceiling per export.')
+
+    def handle(self, *args, **options):
+        count = options['tickets']
+        failures = []
+
+        with rolled_back():
+            screening = make_screening(seats=10)
+            make_tickets(count, screening, make_ticket_type("25.00"))
+            rows_qs = ledger_rows(Ticket.objects.filter(screening=screening))
+
+            for export_format in options['formats']:
+                exporter = EXPORTERS[export_format][0]
+                size = lines = 0
+
+                tracemalloc.start()
+                started = time.perf_counter()
+                for chunk in exporter(rows_qs):
+                    size += len(chunk)
+                    lines += chunk.count("\n")
+                elapsed = time.perf_counter() - started
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                expected_lines = count + (1 if export_format == "csv" else 0)
+                peak_mb = peak / 1024 / 1024
+                line = (
+                    f"{export_format:>6}: {lines} lines, {size / 1024 / 1024:7.1f} MB in {elapsed:6.1f} s, "
+                    f"peak {peak_mb:5.1f} MB"
+                )
+                if lines != expected_lines or peak_mb > options['max_memory_mb']:
+                    failures.append(line)
+                    self.stdout.write(self.style.ERROR(line))
+                else:
+                    self.stdout.write(self.style.SUCCESS(line))
+
+        if failures:
+            raise CommandError(
+                f"Export incomplete or above {options['max_memory_mb']} MB for {len(failures)} format(s)."
+            )
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tickets.services.holds import expire_holds
+
+
+class Command(BaseCommand):
+    help = "Delete expired seat holds in bulk; with --loop keeps sweeping every --interval seconds."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep running and sweep periodically.')
+        parser.add_argument('--interval', type=int, default=30, help='Seconds between sweeps with --loop.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows deleted per statement.')
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = expire_holds(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Expired seat holds deleted: {deleted}'))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,52 @@
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from tickets.services.delivery import claim_deliveries, deliver, retry_dead
+from tickets.utils import delivery_enabled
+
+
+def _deliver(delivery):
+    # każdy wątek ma własne połączenie z bazą, zamykamy je po zadaniu
+    try:
+        return deliver(delivery)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Send queued ticket e-mails concurrently with retries and backoff; with --loop keeps draining the queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Concurrent deliveries.')
+        parser.add_argument('--batch-size', type=int, default=20, help='Deliveries claimed per round.')
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll the queue.')
+        parser.add_argument('--interval', type=int, default=5, help='Seconds between polls when the queue is empty.')
+        parser.add_argument('--retry-dead', action='store_true', help='Move dead deliveries back to the queue first.')
+
+    def handle(self, *args, **options):
+        if not delivery_enabled():
+            # bez SMTP zamówienia czekają w kolejce, nie są oznaczane jako wysłane
+            self.stdout.write(self.style.WARNING("E-mail delivery is not configured; queued deliveries stay pending."))
+            return
+
+        if options['retry_dead']:
+            self.stdout.write(f"Dead deliveries requeued: {retry_dead()}")
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                deliveries = claim_deliveries(batch_size=options['batch_size'])
+                if deliveries:
+                    results = Counter(pool.map(_deliver, deliveries))
+                    self.stdout.write(self.style.SUCCESS(
+                        f"Deliveries: sent {results['SENT']}, retrying {results['PENDING']}, dead {results['DEAD']}"
+                    ))
+                    continue
+
+                if not options['loop']:
+                    self.stdout.write("Delivery queue is empty.")
+                    return
+                time.sleep(options['interval'])
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from tickets.services.pdf_cache import cache_dir, prune
+
+
+class Command(BaseCommand):
+    help = "Delete cached ticket PDFs older than --max-age-days (files left behind by template changes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age-days', type=int, default=30, help='Remove files older than this many days.')
+
+    def handle(self, *args, **options):
+        removed = prune(options['max_age_days'] * 86400)
+        self.stdout.write(self.style.SUCCESS(f'Cached PDFs removed from {cache_dir()}: {removed}'))
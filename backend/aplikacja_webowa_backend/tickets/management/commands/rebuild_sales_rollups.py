@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from tickets.services.sales import rebuild_sales
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-screening, per-movie-day and per-auditorium-day sales rollups from paid tickets."
+
+    def handle(self, *args, **options):
+        counts = rebuild_sales()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt sales rollups: {counts['screenings']} screening, {counts['movie_days']} movie-day and "
+            f"{counts['auditorium_days']} auditorium-day rows."
+        ))
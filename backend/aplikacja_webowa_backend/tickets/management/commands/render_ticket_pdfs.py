@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets.services.pdf_batch import batch_order_numbers, iter_orders_zip
+
+
+class Command(BaseCommand):
+    help = "Render ticket PDFs for many orders in parallel (process pool) into a ZIP archive."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', nargs='*', default=None, help='Order numbers to render.')
+        parser.add_argument('--screening', type=int, default=None, help='Render every order of this screening.')
+        parser.add_argument('--output', required=True, help='Path of the ZIP archive to write.')
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes of a dedicated pool (default: the shared pool, TICKET_PDF_BATCH_WORKERS capped by TICKET_PDF_BATCH_MAX_WORKERS).')
+
+    def handle(self, *args, **options):
+        if not options['orders'] and options['screening'] is None:
+            raise CommandError("Pass --orders or --screening.")
+
+        order_numbers = batch_order_numbers(options['orders'], options['screening'])
+        if not order_numbers:
+            raise CommandError("No matching orders.")
+
+        written = 0
+        with open(options['output'], 'wb') as f:
+            for chunk in iter_orders_zip(order_numbers, workers=options['workers']):
+                f.write(chunk)
+                written += len(chunk)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(order_numbers)} orders -> {options['output']} ({written / 1024:.0f} KiB)"
+        ))
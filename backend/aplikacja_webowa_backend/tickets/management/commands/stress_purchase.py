@@ -0,0 +1,97 @@
+import random
+import threading
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from rest_framework.exceptions import ValidationError
+
+from auditorium.layout import get_layout
+from tickets.models import SoldSeat, Ticket
+from tickets.serializers import InstantPurchaseSerializer
+from ._bench import make_screening, make_ticket_type
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire parallel purchases at a single screening and verify that no seat is sold twice. "
+        "Creates its own auditorium, movie and screening and deletes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Parallel purchasing threads.')
+        parser.add_argument('--orders', type=int, default=25, help='Orders attempted per worker.')
+        parser.add_argument('--seats', type=int, default=60, help='Seats in the contended auditorium.')
+        parser.add_argument('--per-order', type=int, default=2, help='Seats per order.')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        per_order = options['per_order']
+
+        # dane muszą być zatwierdzone, żeby widziały je połączenia wątków
+        screening = make_screening(seats=options['seats'], per_row=10)
+        ticket_type = make_ticket_type()
+        seats = [(row, number) for _, row, number in get_layout(screening.auditorium_id).seats]
+
+        results = Counter()
+        lock = threading.Lock()
+        barrier = threading.Barrier(workers)
+
+        def worker():
+            try:
+                barrier.wait()
+                for _ in range(options['orders']):
+                    picked = random.sample(seats, per_order)
+                    payload = {
+                        "screening_id": screening.id,
+                        "tickets": [{
+                            "ticket_type_id": ticket_type.id,
+                            "seats": [{"row_number": r, "seat_number": n} for r, n in picked],
+                            "first_name": "Stress",
+                            "last_name": "Test",
+                            "email": "stress@example.com",
+                        }],
+                    }
+                    serializer = InstantPurchaseSerializer(data=payload)
+                    try:
+                        serializer.is_valid(raise_exception=True)
+                        serializer.save()
+                        outcome = "sold"
+                    except ValidationError:
+                        outcome = "conflict"
+                    except Exception as exc:
+                        outcome = f"error: {exc.__class__.__name__}"
+                    with lock:
+                        results[outcome] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        try:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            sold_rows = SoldSeat.objects.filter(screening=screening).count()
+            double_sold = (
+                Ticket.seats.through.objects
+                .filter(ticket__screening=screening)
+                .values("seat_id")
+                .annotate(n=Count("id"))
+                .filter(n__gt=1)
+                .count()
+            )
+        finally:
+            screening.movie.delete()
+            screening.auditorium.delete()
+            ticket_type.delete()
+
+        for outcome, count in sorted(results.items()):
+            self.stdout.write(f"{outcome}: {count}")
+        self.stdout.write(f"Seats sold: {sold_rows} of {len(seats)}")
+
+        if double_sold:
+            raise CommandError(f"{double_sold} seats were sold more than once.")
+        self.stdout.write(self.style.SUCCESS("No seat was sold twice."))
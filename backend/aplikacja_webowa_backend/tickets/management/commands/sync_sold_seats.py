@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tickets.models import Ticket
+from tickets.services.availability import invalidate_sold_bitmap, sync_sold_seats
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild SoldSeat rows from Ticket.seats for tickets written outside the purchase flow "
+        "(SQL imports, legacy data). Run after loading data directly into the database."
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            added, removed = sync_sold_seats()
+        # bitmapy miejsc w cache nie znają zaimportowanych biletów
+        for screening_id in Ticket.objects.order_by().values_list("screening_id", flat=True).distinct():
+            invalidate_sold_bitmap(screening_id)
+        self.stdout.write(self.style.SUCCESS(f"SoldSeat: {added} added, {removed} removed."))
@@ -0,0 +1,147 @@
+import random
+from datetime import time, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from screenings.models import Screening
+from tickets.models import PromotionRule, TicketType
+from tickets.services.promotions import build_index
+from ._bench import make_screening, make_ticket_type, rolled_back
+
+
+def _expected(rules, seats_count, ticket_type, screening):
+    """Dotychczasowy algorytm: pełny skan i PromotionRule.matches()."""
+    applicable = [p for p in rules if p.matches(seats_count, ticket_type, screening)]
+    best = max(applicable, key=lambda p: p.discount_percent) if applicable else None
+    return [p.id for p in applicable], best.id if best else None
+
+
+def _random_time(rng):
+    return time(rng.randrange(24), rng.choice([0, 10, 15, 30, 45, 59]))
+
+
+def _random_rule(rng, screenings, ticket_types, now):
+    kind = rng.random()
+    if kind < 0.6:
+        valid_from, valid_to = now - timedelta(days=rng.randint(1, 30)), now + timedelta(days=rng.randint(1, 30))
+    elif kind < 0.8:
+        valid_from, valid_to = now - timedelta(days=60), now - timedelta(days=rng.randint(1, 30))
+    else:
+        valid_from, valid_to = now + timedelta(days=rng.randint(1, 30)), now + timedelta(days=60)
+
+    time_from = time_to = None
+    window = rng.random()
+    if window < 0.4:
+        time_from, time_to = sorted([_random_time(rng), _random_time(rng)])
+    elif window < 0.5:
+        # okno przez północ albo tylko jedna granica - matches() je ignoruje lub odrzuca
+        time_from, time_to = sorted([_random_time(rng), _random_time(rng)], reverse=True)
+    elif window < 0.6:
+        time_from = _random_time(rng)
+
+    return PromotionRule(
+        name=f"rule-{rng.random():.6f}",
+        # mały zbiór wartości, żeby często zdarzały się remisy
+        discount_percent=Decimal(rng.choice(["5.00", "10.00", "15.00", "20.00"])),
+        min_tickets=rng.choice([None, None, 0, 1, 2, 4, 6]),
+        weekday=rng.choice([None, None, None, 0, 1, 2, 3, 4, 5, 6, 7]),
+        time_from=time_from,
+        time_to=time_to,
+        ticket_type=rng.choice([None, None] + ticket_types),
+        screening=rng.choice([None, None, None] + screenings),
+        valid_from=valid_from,
+        valid_to=valid_to,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Check that the compiled promotion index returns the same rules and best discount as "
+        "PromotionRule.matches() on random rule sets (rolled back), or on the real rules with --existing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=None, help='Random seed (printed so failures can be replayed).')
+        parser.add_argument('--rounds', type=int, default=20, help='Random rule sets to generate.')
+        parser.add_argument('--rules', type=int, default=60, help='Rules per rule set.')
+        parser.add_argument('--cases', type=int, default=500, help='Lookups per rule set.')
+        parser.add_argument('--existing', action='store_true', help='Check the real rules against upcoming screenings instead.')
+
+    def handle(self, *args, **options):
+        self.matched = 0
+        if options['existing']:
+            failures, checked = self._check_existing()
+        else:
+            seed = options['seed'] if options['seed'] is not None else random.randrange(2 ** 32)
+            self.stdout.write(f"seed {seed}")
+            failures, checked = self._check_random(random.Random(seed), options)
+
+        for failure in failures[:20]:
+            self.stdout.write(self.style.ERROR(failure))
+        if failures:
+            raise CommandError(f"{len(failures)} of {checked} lookups differ from PromotionRule.matches().")
+        self.stdout.write(self.style.SUCCESS(
+            f"{checked} lookups ({self.matched} with a promotion) match PromotionRule.matches()."
+        ))
+
+    def _compare(self, rules, index, seats_count, ticket_type, screening):
+        expected = _expected(rules, seats_count, ticket_type, screening)
+        applicable = index.applicable(seats_count, ticket_type, screening)
+        best = index.best(seats_count, ticket_type, screening)
+        actual = ([p.id for p in applicable], best.id if best else None)
+        if expected[1] is not None:
+            self.matched += 1
+        if actual != expected:
+            return (
+                f"screening={screening.id} start={screening.start_time} ticket_type="
+                f"{ticket_type.id if ticket_type else None} seats={seats_count}: "
+                f"expected {expected}, got {actual}"
+            )
+        return None
+
+    def _check_random(self, rng, options):
+        failures, checked = [], 0
+        with rolled_back():
+            base = make_screening(seats=10)
+            now = timezone.now()
+            screenings = []
+            for i in range(12):
+                start = (now + timedelta(days=rng.randint(0, 13), hours=rng.randint(0, 23))).replace(
+                    minute=rng.choice([0, 10, 20, 30, 40, 50]), second=0, microsecond=0
+                ) + timedelta(minutes=10 * i)
+                screenings.append(Screening.objects.create(
+                    movie=base.movie, auditorium=base.auditorium, start_time=start, published_at=now - timedelta(days=1)
+                ))
+            ticket_types = [make_ticket_type() for _ in range(3)]
+
+            for _ in range(options['rounds']):
+                with rolled_back():
+                    PromotionRule.objects.bulk_create([
+                        _random_rule(rng, screenings, ticket_types, now) for _ in range(options['rules'])
+                    ])
+                    rules = list(PromotionRule.objects.order_by("id").select_related("ticket_type", "screening"))
+                    index = build_index()
+                    for _ in range(options['cases']):
+                        failure = self._compare(
+                            rules, index, rng.randint(1, 8), rng.choice(ticket_types + [None]), rng.choice(screenings)
+                        )
+                        checked += 1
+                        if failure:
+                            failures.append(failure)
+        return failures, checked
+
+    def _check_existing(self):
+        failures, checked = [], 0
+        rules = list(PromotionRule.objects.order_by("id").select_related("ticket_type", "screening"))
+        index = build_index()
+        ticket_types = list(TicketType.objects.all())
+        for screening in Screening.objects.filter(start_time__gte=timezone.now()).order_by("start_time")[:500]:
+            for ticket_type in ticket_types:
+                for seats_count in range(1, 11):
+                    failure = self._compare(rules, index, seats_count, ticket_type, screening)
+                    checked += 1
+                    if failure:
+                        failures.append(failure)
+        return failures, checked
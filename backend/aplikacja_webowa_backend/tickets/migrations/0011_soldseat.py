@@ -0,0 +1,50 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_sold_seats(apps, schema_editor):
+    Ticket = apps.get_model('tickets', 'Ticket')
+    SoldSeat = apps.get_model('tickets', 'SoldSeat')
+    TicketSeat = Ticket.seats.through
+
+    # przy ewentualnych duplikatach z przeszlosci zostaje najstarszy bilet
+    rows = (
+        TicketSeat.objects.order_by('ticket_id')
+        .values_list('ticket_id', 'ticket__screening_id', 'seat_id')
+        .iterator(chunk_size=2000)
+    )
+    batch = []
+    for ticket_id, screening_id, seat_id in rows:
+        batch.append(SoldSeat(ticket_id=ticket_id, screening_id=screening_id, seat_id=seat_id))
+        if len(batch) >= 2000:
+            SoldSeat.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        SoldSeat.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auditorium', '0004_alter_seat_row_number_alter_seat_seat_number'),
+        ('screenings', '0004_screening_chk_start_time_gte_published_at_and_more'),
+        ('tickets', '0010_alter_ticket_payment_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SoldSeat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('screening', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sold_seats', to='screenings.screening')),
+                ('seat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='auditorium.seat')),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sold_seats', to='tickets.ticket')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('screening', 'seat'), name='uniq_sold_seat_per_screening')],
+            },
+        ),
+        migrations.RunPython(backfill_sold_seats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auditorium', '0004_alter_seat_row_number_alter_seat_seat_number'),
+        ('screenings', '0004_screening_chk_start_time_gte_published_at_and_more'),
+        ('tickets', '0011_soldseat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(db_index=True, max_length=32)),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('screening', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_holds', to='screenings.screening')),
+                ('seat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='auditorium.seat')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['screening', 'expires_at'], name='seathold_screening_expiry_idx'), models.Index(fields=['expires_at'], name='seathold_expiry_idx')],
+                'constraints': [models.UniqueConstraint(fields=('screening', 'seat'), name='uniq_seat_hold_per_screening')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('screenings', '0004_screening_chk_start_time_gte_published_at_and_more'),
+        ('tickets', '0013_ticketdelivery'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='promotionrule',
+            index=models.Index(fields=['valid_to', 'valid_from'], name='promotion_validity_idx'),
+        ),
+    ]
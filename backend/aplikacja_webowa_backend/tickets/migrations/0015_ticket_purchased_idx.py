@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auditorium', '0004_alter_seat_row_number_alter_seat_seat_number'),
+        ('screenings', '0004_screening_chk_start_time_gte_published_at_and_more'),
+        ('tickets', '0014_promotionrule_validity_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['purchased_at', 'id'], name='ticket_purchased_idx'),
+        ),
+    ]
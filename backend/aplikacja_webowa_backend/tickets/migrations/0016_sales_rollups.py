@@ -0,0 +1,121 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:35
+
+from collections import defaultdict
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+
+def backfill_sales(apps, schema_editor):
+    # bilety sprzed rollupow - bez tego zwrot starego biletu pomniejszalby nieistniejace wiersze
+    Ticket = apps.get_model('tickets', 'Ticket')
+    Screening = apps.get_model('screenings', 'Screening')
+    ScreeningSales = apps.get_model('tickets', 'ScreeningSales')
+    MovieDailySales = apps.get_model('tickets', 'MovieDailySales')
+    AuditoriumDailySales = apps.get_model('tickets', 'AuditoriumDailySales')
+
+    def totals():
+        return {'tickets': 0, 'seats': 0, 'revenue': Decimal('0')}
+
+    paid = Ticket.objects.filter(payment_status='PAID')
+    per_screening = defaultdict(totals)
+    for row in paid.order_by().values('screening_id', 'type_id').annotate(tickets=Count('id'), revenue=Sum('total_price')):
+        per_screening[(row['screening_id'], row['type_id'])].update(tickets=row['tickets'], revenue=row['revenue'])
+    for row in (
+        Ticket.seats.through.objects.filter(ticket__in=paid).order_by()
+        .values('ticket__screening_id', 'ticket__type_id').annotate(seats=Count('id'))
+    ):
+        per_screening[(row['ticket__screening_id'], row['ticket__type_id'])]['seats'] = row['seats']
+
+    screenings = {
+        s['id']: s for s in Screening.objects.filter(id__in={key[0] for key in per_screening})
+        .values('id', 'movie_id', 'auditorium_id', 'start_time')
+    }
+    per_movie = defaultdict(totals)
+    per_auditorium = defaultdict(totals)
+    screening_rows = []
+    for (screening_id, ticket_type_id), row_totals in per_screening.items():
+        screening = screenings[screening_id]
+        day = timezone.localdate(screening['start_time'])
+        screening_rows.append(ScreeningSales(screening_id=screening_id, ticket_type_id=ticket_type_id, day=day, **row_totals))
+        for rollup, key in (
+            (per_movie, (screening['movie_id'], day, ticket_type_id)),
+            (per_auditorium, (screening['auditorium_id'], day, ticket_type_id)),
+        ):
+            for name, value in row_totals.items():
+                rollup[key][name] += value
+
+    ScreeningSales.objects.bulk_create(screening_rows, batch_size=1000)
+    MovieDailySales.objects.bulk_create([
+        MovieDailySales(movie_id=movie_id, day=day, ticket_type_id=ticket_type_id, **row_totals)
+        for (movie_id, day, ticket_type_id), row_totals in per_movie.items()
+    ], batch_size=1000)
+    AuditoriumDailySales.objects.bulk_create([
+        AuditoriumDailySales(auditorium_id=auditorium_id, day=day, ticket_type_id=ticket_type_id, **row_totals)
+        for (auditorium_id, day, ticket_type_id), row_totals in per_auditorium.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auditorium', '0004_alter_seat_row_number_alter_seat_seat_number'),
+        ('movies', '0006_alter_movie_poster_path'),
+        ('screenings', '0004_screening_chk_start_time_gte_published_at_and_more'),
+        ('tickets', '0015_ticket_purchased_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditoriumDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tickets', models.PositiveIntegerField(default=0)),
+                ('seats', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('day', models.DateField()),
+                ('auditorium', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='auditorium.auditorium')),
+                ('ticket_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tickets.tickettype')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'auditorium'], name='auditorium_sales_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('auditorium', 'day', 'ticket_type'), name='uniq_auditorium_daily_sales')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MovieDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tickets', models.PositiveIntegerField(default=0)),
+                ('seats', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('day', models.DateField()),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='movies.movie')),
+                ('ticket_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tickets.tickettype')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'movie'], name='movie_sales_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('movie', 'day', 'ticket_type'), name='uniq_movie_daily_sales')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScreeningSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tickets', models.PositiveIntegerField(default=0)),
+                ('seats', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('day', models.DateField()),
+                ('screening', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales', to='screenings.screening')),
+                ('ticket_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tickets.tickettype')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='screening_sales_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('screening', 'ticket_type'), name='uniq_screening_sales')],
+            },
+        ),
+        migrations.RunPython(backfill_sales, migrations.RunPython.noop),
+    ]
@@ -40,6 +40,134 @@ class Ticket(models.Model):
         default='PAID'
     )
 
+    class Meta:
+        indexes = [
+            # rejestr sprzedaży (TicketsView) - stronicowanie kursorem po (purchased_at, id)
+            models.Index(fields=['purchased_at', 'id'], name='ticket_purchased_idx'),
+        ]
+
+
+class SoldSeat(models.Model):
+    # jedno miejsce na seans moze byc sprzedane tylko raz - pilnuje tego baza
+    screening = models.ForeignKey(Screening, on_delete=models.CASCADE, related_name="sold_seats")
+    seat = models.ForeignKey(Seat, on_delete=models.CASCADE)
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name="sold_seats")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['screening', 'seat'],
+                name='uniq_sold_seat_per_screening'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.screening_id} - {self.seat_id}"
+
+
+class SeatHold(models.Model):
+    # tymczasowa blokada miejsca na czas wypelniania formularza zakupu
+    screening = models.ForeignKey(Screening, on_delete=models.CASCADE, related_name="seat_holds")
+    seat = models.ForeignKey(Seat, on_delete=models.CASCADE)
+    token = models.CharField(max_length=32, db_index=True)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['screening', 'seat'],
+                name='uniq_seat_hold_per_screening'
+            )
+        ]
+        indexes = [
+            # aktywne blokady seansu: screening_id = X AND expires_at > now
+            models.Index(fields=['screening', 'expires_at'], name='seathold_screening_expiry_idx'),
+            # sprzatanie wygaslych blokad
+            models.Index(fields=['expires_at'], name='seathold_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.screening_id} - {self.seat_id} ({self.token})"
+
+
+class TicketDelivery(models.Model):
+    # kolejka wysylki biletow mailem (outbox), oprozniana przez process_ticket_deliveries
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('SENT', 'Sent'),
+        ('DEAD', 'Dead'),
+    )
+
+    order_number = models.CharField(max_length=50, unique=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # wybor zadan do wysylki: status = 'PENDING' AND next_attempt_at <= now
+            models.Index(fields=['status', 'next_attempt_at'], name='delivery_status_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.order_number} ({self.status})"
+
+
+class SalesRollup(models.Model):
+    # sprzedaz zagregowana po typie biletu - utrzymywana przy zakupie (tickets.services.sales),
+    # odtwarzana od zera przez rebuild_sales_rollups
+    ticket_type = models.ForeignKey(TicketType, on_delete=models.CASCADE)
+    tickets = models.PositiveIntegerField(default=0)
+    seats = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        abstract = True
+
+
+class ScreeningSales(SalesRollup):
+    screening = models.ForeignKey(Screening, on_delete=models.CASCADE, related_name="sales")
+    # dzien seansu (czas lokalny), zeby raport po dniach nie laczyl sie z seansami
+    day = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['screening', 'ticket_type'], name='uniq_screening_sales'),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='screening_sales_day_idx'),
+        ]
+
+
+class MovieDailySales(SalesRollup):
+    movie = models.ForeignKey('movies.Movie', on_delete=models.CASCADE, related_name="daily_sales")
+    day = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['movie', 'day', 'ticket_type'], name='uniq_movie_daily_sales'),
+        ]
+        indexes = [
+            models.Index(fields=['day', 'movie'], name='movie_sales_day_idx'),
+        ]
+
+
+class AuditoriumDailySales(SalesRollup):
+    auditorium = models.ForeignKey('auditorium.Auditorium', on_delete=models.CASCADE, related_name="daily_sales")
+    day = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['auditorium', 'day', 'ticket_type'], name='uniq_auditorium_daily_sales'),
+        ]
+        indexes = [
+            models.Index(fields=['day', 'auditorium'], name='auditorium_sales_day_idx'),
+        ]
+
 
 from django.utils import timezone
 
@@ -55,6 +183,12 @@ class PromotionRule(models.Model):
     valid_from = models.DateTimeField()
     valid_to = models.DateTimeField()
 
+    class Meta:
+        indexes = [
+            # aktywne reguły: valid_to >= now AND valid_from <= now - wygasłe odpadają na pierwszej kolumnie
+            models.Index(fields=['valid_to', 'valid_from'], name='promotion_validity_idx'),
+        ]
+
     def is_active(self):
         now = timezone.now()
         return self.valid_from <= now <= self.valid_to
@@ -84,30 +218,3 @@ class PromotionRule(models.Model):
             return False
 
         return True
-
-def calculate_ticket_price(seats, ticket_type, screening):
-    base_price = ticket_type.price
-    seats_count = len(seats)
-
-    active_promos = PromotionRule.objects.all()
-    applicable_promos = []
-
-    print(f"\n--- Sprawdzanie promocji dla seansu '{screening}' i typu biletu '{ticket_type}' ---")
-    for p in active_promos:
-        match = p.matches(seats_count, ticket_type, screening)
-        print(f"Promocja '{p.name}': aktywna={p.is_active()}, dopasowana={match}")
-        if match:
-            applicable_promos.append(p)
-
-    if applicable_promos:
-        best_promo = max(applicable_promos, key=lambda p: p.discount_percent)
-        print(f"Najlepsza promocja: '{best_promo.name}' z {best_promo.discount_percent}% zniżki")
-        base_price *= (1 - best_promo.discount_percent / 100)
-    else:
-        print("Brak dopasowanych promocji")
-
-    total_price = round(base_price * seats_count, 2)
-    print(f"Cena końcowa za {seats_count} bilet(y): {total_price} zł")
-    return total_price
-
-
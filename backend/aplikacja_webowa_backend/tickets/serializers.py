@@ -1,11 +1,64 @@
+from django.conf import settings
 from django.utils import timezone
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 from screenings.models import Screening
+from auditorium.layout import get_layout
 from auditorium.models import Seat
-from tickets.models import Ticket, TicketType, calculate_ticket_price, PromotionRule
+from tickets.models import Ticket, TicketType, SoldSeat, PromotionRule
 from django.db.models import Max
 from screenings.serializers import ScreeningReadSerializer
+from tickets.services.availability import invalidate_sold_bitmap
+from tickets.services.holds import active_held_seat_ids, create_hold, release_hold
+from tickets.services.delivery import enqueue_delivery
+from tickets.services.pricing import quote_basket
+from tickets.services.sales import record_sales
+from tickets.services.pdf_batch import batch_order_numbers
 import uuid
+from datetime import timedelta
+
+def _resolve_seats(layout, seats, requested, errors):
+    """Zamienia (rząd, miejsce) na id miejsc z układu sali, błędy dopisuje do `errors`."""
+    seat_ids = []
+    for s in seats:
+        row_number, seat_number = s["row_number"], s["seat_number"]
+        if not layout.has_row(row_number):
+            errors.append(f"Rząd {row_number} nie istnieje")
+            continue
+
+        seat_id = layout.resolve(row_number, seat_number)
+        if seat_id is None:
+            errors.append(f"Miejsce {row_number}-{seat_number} nie istnieje")
+            continue
+
+        if seat_id in requested:
+            errors.append(f"Miejsce {row_number}-{seat_number} zostało wybrane więcej niż raz.")
+            continue
+
+        requested[seat_id] = (row_number, seat_number)
+        seat_ids.append(seat_id)
+    return seat_ids
+
+
+def _unavailable_seat_errors(screening_id, requested, hold_token=None):
+    """Błędy dla miejsc już sprzedanych lub zablokowanych przez innego klienta."""
+    if not requested:
+        return []
+    sold_ids = set(
+        SoldSeat.objects
+        .filter(screening_id=screening_id, seat_id__in=requested)
+        .values_list("seat_id", flat=True)
+    )
+    held_ids = active_held_seat_ids(screening_id, exclude_token=hold_token)
+
+    errors = []
+    for seat_id, (row_number, seat_number) in requested.items():
+        if seat_id in sold_ids:
+            errors.append(f"Miejsce {row_number}-{seat_number} jest już sprzedane.")
+        elif seat_id in held_ids:
+            errors.append(f"Miejsce {row_number}-{seat_number} jest tymczasowo zarezerwowane.")
+    return errors
+
 
 class TicketSeatSerializer(serializers.Serializer):
     row_number = serializers.IntegerField(min_value=1)
@@ -24,48 +77,36 @@ class TicketPurchaseItemSerializer(serializers.Serializer):
 class InstantPurchaseSerializer(serializers.Serializer):
     screening_id = serializers.IntegerField()
     tickets = TicketPurchaseItemSerializer(many=True)
+    hold_token = serializers.CharField(max_length=32, required=False, allow_blank=True)
 
     def validate(self, data):
         try:
-            screening = Screening.objects.get(id=data["screening_id"])
+            screening = Screening.objects.select_related("movie", "auditorium").get(id=data["screening_id"])
         except Screening.DoesNotExist:
             raise serializers.ValidationError("Seans nie istnieje")
 
         data["screening"] = screening
+        layout = get_layout(screening.auditorium_id)
+        ticket_types = TicketType.objects.in_bulk({item["ticket_type_id"] for item in data["tickets"]})
+
+        # zbieramy wszystkie błędy naraz zamiast przerywać na pierwszym
+        errors = []
+        requested = {}
 
         for item in data["tickets"]:
-            try:
-                ticket_type = TicketType.objects.get(id=item["ticket_type_id"])
-            except TicketType.DoesNotExist:
-                raise serializers.ValidationError("Typ biletu nie istnieje")
+            ticket_type = ticket_types.get(item["ticket_type_id"])
+            if ticket_type is None and "Typ biletu nie istnieje" not in errors:
+                errors.append("Typ biletu nie istnieje")
 
             item["ticket_type"] = ticket_type
-            seat_objs = []
-
-            for s in item["seats"]:
-                row_seats = Seat.objects.filter(
-                    auditorium=screening.auditorium,
-                    row_number=s["row_number"]
-                )
-                if not row_seats.exists():
-                    raise serializers.ValidationError(f"Rząd {s['row_number']} nie istnieje")
+            item["seat_ids"] = _resolve_seats(layout, item["seats"], requested, errors)
 
-                try:
-                    seat = row_seats.get(seat_number=s["seat_number"])
-                except Seat.DoesNotExist:
-                    raise serializers.ValidationError(
-                        f"Miejsce {s['row_number']}-{s['seat_number']} nie istnieje"
-                    )
+        errors.extend(_unavailable_seat_errors(screening.id, requested, data.get("hold_token")))
 
-                if Ticket.objects.filter(screening=screening, seats=seat).exists():
-                    raise serializers.ValidationError(
-                        f"Miejsce {s['row_number']}-{s['seat_number']} jest już sprzedane."
-                    )
-
-                seat_objs.append(seat)
-
-            item["seats_objs"] = seat_objs
+        if errors:
+            raise serializers.ValidationError(errors)
 
+        data["requested_seats"] = requested
         return data
 
     def create(self, validated_data):
@@ -73,33 +114,147 @@ class InstantPurchaseSerializer(serializers.Serializer):
         user = request.user if request and request.user.is_authenticated else None
         screening = validated_data["screening"]
 
-        tickets_created = []
-
         group_order_number = f"ORD{int(timezone.now().timestamp())}-{uuid.uuid4().hex[:6]}"
 
-        for item in validated_data["tickets"]:
-            ticket_type = item["ticket_type"]
-            seats = item["seats_objs"]
-            total_price = calculate_ticket_price(seats, ticket_type, screening)
+        # cały koszyk wyceniany na jednym snapshocie promocji i jednej chwili
+        quotes = quote_basket(
+            screening,
+            [(item["ticket_type"], len(item["seat_ids"])) for item in validated_data["tickets"]],
+        )
 
-            ticket = Ticket.objects.create(
+        tickets_created = []
+        for item, price in zip(validated_data["tickets"], quotes):
+            tickets_created.append(Ticket(
                 user=user,
                 screening=screening,
-                type=ticket_type,
-                total_price=total_price,
+                type=item["ticket_type"],
+                total_price=price.final_price,
                 order_number=group_order_number,
                 first_name=item["first_name"],
                 last_name=item["last_name"],
                 email=item["email"],
                 phone_number=item.get("phone_number", ""),
                 payment_status="PAID",
+            ))
+
+        TicketSeat = Ticket.seats.through
+        requested = validated_data["requested_seats"]
+
+        # konflikt miejsc wykrywa unikalny indeks sold_seat, a nie wcześniejszy odczyt
+        try:
+            with transaction.atomic():
+                # blokada mogła powstać po validate() - cudza wygrywa, jak przy sprzedanym miejscu
+                held = active_held_seat_ids(screening.id, exclude_token=validated_data.get("hold_token")) & requested.keys()
+                if held:
+                    raise serializers.ValidationError([
+                        f"Miejsce {requested[seat_id][0]}-{requested[seat_id][1]} jest tymczasowo zarezerwowane."
+                        for seat_id in held
+                    ])
+                Ticket.objects.bulk_create(tickets_created)
+
+                ticket_seats = []
+                sold_seats = []
+                for ticket, item in zip(tickets_created, validated_data["tickets"]):
+                    for seat_id in item["seat_ids"]:
+                        ticket_seats.append(TicketSeat(ticket_id=ticket.id, seat_id=seat_id))
+                        sold_seats.append(SoldSeat(screening=screening, seat_id=seat_id, ticket_id=ticket.id))
+
+                TicketSeat.objects.bulk_create(ticket_seats)
+                SoldSeat.objects.bulk_create(sold_seats)
+                if validated_data.get("hold_token"):
+                    release_hold(validated_data["hold_token"], screening_id=screening.id)
+                record_sales(screening, [
+                    (ticket.type_id, len(item["seat_ids"]), ticket.total_price)
+                    for ticket, item in zip(tickets_created, validated_data["tickets"])
+                ])
+                # mail z biletami wysyla worker, zakup nie czeka na PDF i SMTP
+                enqueue_delivery(group_order_number)
+        except IntegrityError:
+            raise serializers.ValidationError(
+                _unavailable_seat_errors(screening.id, requested, validated_data.get("hold_token"))
+                or ["Wybrane miejsca zostały właśnie sprzedane."]
             )
-            ticket.seats.set(seats)
-            tickets_created.append(ticket)
+
+        # miejsca znane z układu sali trafiają do biletów, odpowiedź nie odpytuje ponownie bazy
+        for ticket, item in zip(tickets_created, validated_data["tickets"]):
+            ticket.created_seats = [
+                Seat(id=seat_id, auditorium_id=screening.auditorium_id,
+                     row_number=requested[seat_id][0], seat_number=requested[seat_id][1])
+                for seat_id in item["seat_ids"]
+            ]
+
+        transaction.on_commit(lambda: invalidate_sold_bitmap(screening.id))
 
         return tickets_created
 
 
+class SeatHoldSerializer(serializers.Serializer):
+    screening_id = serializers.IntegerField()
+    seats = TicketSeatSerializer(many=True)
+    hold_token = serializers.CharField(max_length=32, required=False, allow_blank=True)
+
+    def validate(self, data):
+        auditorium_id = (
+            Screening.objects.filter(id=data["screening_id"])
+            .values_list("auditorium_id", flat=True)
+            .first()
+        )
+        if auditorium_id is None:
+            raise serializers.ValidationError("Seans nie istnieje")
+
+        errors = []
+        requested = {}
+        data["seat_ids"] = _resolve_seats(get_layout(auditorium_id), data["seats"], requested, errors)
+        errors.extend(_unavailable_seat_errors(data["screening_id"], requested, data.get("hold_token")))
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        data["requested_seats"] = requested
+        return data
+
+    def create(self, validated_data):
+        screening_id = validated_data["screening_id"]
+        try:
+            token, expires_at = create_hold(
+                screening_id, validated_data["seat_ids"], token=validated_data.get("hold_token") or None
+            )
+        except IntegrityError:
+            # ktoś zablokował miejsce między walidacją a zapisem
+            raise serializers.ValidationError(
+                _unavailable_seat_errors(screening_id, validated_data["requested_seats"])
+                or ["Wybrane miejsca zostały właśnie zarezerwowane."]
+            )
+
+        return {
+            "hold_token": token,
+            "expires_at": expires_at,
+            "seats": [
+                {"id": seat_id, "row_number": row_number, "seat_number": seat_number}
+                for seat_id, (row_number, seat_number) in validated_data["requested_seats"].items()
+            ],
+        }
+
+
+class BatchTicketPDFSerializer(serializers.Serializer):
+    order_numbers = serializers.ListField(child=serializers.CharField(max_length=50), required=False, allow_empty=False)
+    screening_id = serializers.IntegerField(required=False)
+
+    def validate(self, data):
+        if not data.get("order_numbers") and data.get("screening_id") is None:
+            raise serializers.ValidationError("Podaj numery zamówień lub id seansu.")
+
+        order_numbers = batch_order_numbers(data.get("order_numbers"), data.get("screening_id"))
+        if not order_numbers:
+            raise serializers.ValidationError("Nie znaleziono żadnych zamówień.")
+
+        limit = settings.TICKET_PDF_BATCH_MAX_ORDERS
+        if len(order_numbers) > limit:
+            raise serializers.ValidationError(f"Jednorazowo można wygenerować najwyżej {limit} zamówień.")
+
+        data["resolved_order_numbers"] = order_numbers
+        return data
+
+
 class InstantPurchaseResponseSerializer(serializers.Serializer):
     ticket_type = serializers.CharField(source="type.name")
     price = serializers.DecimalField(max_digits=8, decimal_places=2, source="total_price")
@@ -116,9 +271,11 @@ class InstantPurchaseResponseSerializer(serializers.Serializer):
         }
 
     def get_seat(self, obj):
-        seats = obj.seats.all()
-        if seats.exists():
-            seat = seats.first()
+        seats = getattr(obj, "created_seats", None)
+        if seats is None:
+            seats = list(obj.seats.all())
+        if seats:
+            seat = seats[0]
             return {
                 "id": seat.id,
                 "row_number": seat.row_number,
@@ -179,3 +336,19 @@ class PromotionRuleSerializer(serializers.ModelSerializer):
             "valid_from",
             "valid_to",
         ]
+
+
+class SalesReportQuerySerializer(serializers.Serializer):
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    screening_id = serializers.IntegerField(required=False)
+    movie_id = serializers.IntegerField(required=False)
+    auditorium_id = serializers.IntegerField(required=False)
+
+    def validate(self, data):
+        today = timezone.localdate()
+        data.setdefault("date_to", today)
+        data.setdefault("date_from", data["date_to"] - timedelta(days=30))
+        if data["date_from"] > data["date_to"]:
+            raise serializers.ValidationError("date_from nie może być późniejsza niż date_to")
+        return data
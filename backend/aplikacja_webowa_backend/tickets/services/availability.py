@@ -0,0 +1,153 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+
+from auditorium.layout import get_layout
+from tickets.models import SoldSeat, Ticket
+from tickets.services.holds import active_held_seat_ids
+
+
+def _timeout():
+    return getattr(settings, "SEAT_MAP_CACHE_TIMEOUT", 30)
+
+
+def _version_key(screening_id):
+    return f"screening:{screening_id}:sold_version"
+
+
+def _bitmap_key(screening_id, version):
+    return f"screening:{screening_id}:sold_bitmap:{version}"
+
+
+def _sold_version(screening_id):
+    key = _version_key(screening_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, _timeout())
+        version = cache.get(key)
+    return version
+
+
+def _cached_bits(screening_id, version, layout):
+    cached = cache.get(_bitmap_key(screening_id, version))
+    # bitmapa jest ważna tylko dla wersji układu sali, na której ją zbudowano
+    if cached is None or cached[0] != layout.version:
+        return None
+    return cached[1]
+
+
+def _store_bits(screening_id, version, layout, bitmap):
+    cache.set(_bitmap_key(screening_id, version), (layout.version, bitmap.to_bytes()), _timeout())
+
+
+def sync_sold_seats():
+    """
+    Uzgadnia SoldSeat z Ticket.seats dla danych zapisanych z pominięciem zakupu
+    (import SQL, stare bilety). Przy duplikatach zostaje najstarszy bilet.
+    Zwraca (dodane, usunięte).
+    """
+    TicketSeat = Ticket.seats.through
+    backed = TicketSeat.objects.filter(
+        ticket_id=OuterRef("ticket_id"), seat_id=OuterRef("seat_id"), ticket__screening_id=OuterRef("screening_id")
+    )
+    removed, _ = SoldSeat.objects.filter(~Exists(backed)).delete()
+
+    before = SoldSeat.objects.count()
+    batch = []
+    rows = (
+        TicketSeat.objects.order_by("ticket_id")
+        .values_list("ticket_id", "ticket__screening_id", "seat_id")
+        .iterator(chunk_size=2000)
+    )
+    for ticket_id, screening_id, seat_id in rows:
+        batch.append(SoldSeat(ticket_id=ticket_id, screening_id=screening_id, seat_id=seat_id))
+        if len(batch) >= 2000:
+            SoldSeat.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        SoldSeat.objects.bulk_create(batch, ignore_conflicts=True)
+    return SoldSeat.objects.count() - before, removed
+
+
+class SeatBitmap:
+    """Bitmapa miejsc seansu: bit o numerze `ordinal` = miejsce zajęte."""
+
+    __slots__ = ("size", "bits")
+
+    def __init__(self, size, bits=None):
+        self.size = size
+        self.bits = bytearray(bits) if bits is not None else bytearray((size + 7) // 8)
+
+    def set(self, ordinal):
+        self.bits[ordinal >> 3] |= 1 << (ordinal & 7)
+
+    def is_set(self, ordinal):
+        return bool(self.bits[ordinal >> 3] & (1 << (ordinal & 7)))
+
+    def to_bytes(self):
+        return bytes(self.bits)
+
+
+def _build_sold_bitmap(screening_id, layout):
+    bitmap = SeatBitmap(len(layout))
+    sold_ids = (
+        SoldSeat.objects
+        .filter(screening_id=screening_id)
+        .values_list("seat_id", flat=True)
+    )
+    for seat_id in sold_ids:
+        ordinal = layout.ordinals.get(seat_id)
+        if ordinal is not None:
+            bitmap.set(ordinal)
+    return bitmap
+
+
+def get_sold_bitmap(screening_id, auditorium_id):
+    """
+    Wersja sprzedaży jest czytana przed zapytaniem o SoldSeat, więc bitmapa zbudowana
+    przed równoległym zakupem trafia pod starą wersję i nie przesłoni nowej.
+    """
+    layout = get_layout(auditorium_id)
+    version = _sold_version(screening_id)
+    bits = _cached_bits(screening_id, version, layout)
+    if bits is not None:
+        return SeatBitmap(len(layout), bits)
+
+    bitmap = _build_sold_bitmap(screening_id, layout)
+    _store_bits(screening_id, version, layout, bitmap)
+    return bitmap
+
+
+def invalidate_sold_bitmap(screening_id):
+    """
+    Nowa wersja sprzedaży seansu (po commicie zakupu lub zwrotu) - bitmapa zostanie
+    zbudowana z SoldSeat przy następnym odczycie. Bez odczytu i zapisu kopii bitmapy,
+    więc równoległe zakupy nie gubią nawzajem swoich miejsc.
+    """
+    cache.set(_version_key(screening_id), uuid.uuid4().hex, _timeout())
+
+
+def build_seat_map(screening_id, auditorium_id, hold_token=None):
+    """
+    Mapa miejsc w formacie ScreeningSeatsView: {row_number: [miejsca]}.
+    Blokady z `hold_token` (własne blokady klienta) nie są oznaczane jako held.
+    """
+    layout = get_layout(auditorium_id)
+    sold = get_sold_bitmap(screening_id, auditorium_id)
+    held = active_held_seat_ids(screening_id, exclude_token=hold_token)
+
+    rows = {}
+    for ordinal, (seat_id, row_number, seat_number) in enumerate(layout.seats):
+        row = rows.get(row_number)
+        if row is None:
+            row = rows[row_number] = []
+        row.append({
+            "id": seat_id,
+            "row_number": row_number,
+            "seat_number": seat_number,
+            "reserved": sold.is_set(ordinal),
+            "held": seat_id in held,
+        })
+    return rows
@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from tickets.models import Ticket, TicketDelivery
+from tickets.utils import delivery_enabled, send_email
+
+
+def _max_attempts():
+    return getattr(settings, "TICKET_DELIVERY_MAX_ATTEMPTS", 5)
+
+
+def _backoff(attempts):
+    """Opóźnienie kolejnej próby: base * 2^(attempts-1), ograniczone z góry."""
+    base = getattr(settings, "TICKET_DELIVERY_BACKOFF", 30)
+    cap = getattr(settings, "TICKET_DELIVERY_BACKOFF_MAX", 3600)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), cap))
+
+
+def _lease():
+    return timedelta(seconds=getattr(settings, "TICKET_DELIVERY_LEASE", 300))
+
+
+def enqueue_delivery(order_number):
+    """
+    Dodaje wysyłkę zamówienia do kolejki (wywoływane w transakcji zakupu). Przy wyłączonej
+    wysyłce też - zamówienie czeka jako PENDING, aż worker dostanie konfigurację SMTP.
+    """
+    return TicketDelivery.objects.create(order_number=order_number, next_attempt_at=timezone.now())
+
+
+def claim_deliveries(batch_size=20, now=None):
+    """
+    Rezerwuje paczkę zaległych wysyłek. Wiersze zablokowane przez inny worker są
+    pomijane (skip_locked), a zarezerwowanym przesuwa się next_attempt_at o czas
+    dzierżawy, żeby po commicie nie wziął ich nikt inny, dopóki ten worker pracuje.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        deliveries = list(
+            TicketDelivery.objects
+            .select_for_update(skip_locked=True)
+            .filter(status="PENDING", next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        if deliveries:
+            TicketDelivery.objects.filter(id__in=[d.id for d in deliveries]).update(
+                next_attempt_at=now + _lease()
+            )
+    return deliveries
+
+
+def _order_tickets(order_number):
+    return list(
+        Ticket.objects.filter(order_number=order_number)
+        .select_related("screening__movie", "screening__auditorium", "type")
+        .prefetch_related("seats")
+    )
+
+
+def deliver(delivery):
+    """
+    Wysyła bilety jednego zamówienia i zapisuje wynik próby. SENT tylko po wysłaniu
+    wiadomości z PDF-em; przy wyłączonej wysyłce wiersz zostaje PENDING bez liczenia próby
+    i wraca do kolejki po wygaśnięciu dzierżawy.
+    """
+    if not delivery_enabled():
+        return "PENDING"
+    now = timezone.now()
+    try:
+        tickets = _order_tickets(delivery.order_number)
+        if not tickets:
+            raise Ticket.DoesNotExist(f"Brak biletów dla zamówienia {delivery.order_number}")
+        send_email(tickets, delivery.order_number, None, sum(t.total_price for t in tickets))
+    except Exception as exc:
+        attempts = delivery.attempts + 1
+        dead = attempts >= _max_attempts()
+        TicketDelivery.objects.filter(id=delivery.id).update(
+            attempts=attempts,
+            status="DEAD" if dead else "PENDING",
+            next_attempt_at=now if dead else now + _backoff(attempts),
+            last_error=f"{type(exc).__name__}: {exc}",
+        )
+        return "DEAD" if dead else "PENDING"
+
+    TicketDelivery.objects.filter(id=delivery.id).update(
+        attempts=delivery.attempts + 1,
+        status="SENT",
+        sent_at=now,
+        last_error="",
+    )
+    return "SENT"
+
+
+def retry_dead(order_numbers=None):
+    """Przywraca martwe wysyłki do kolejki (np. po naprawie konfiguracji SMTP)."""
+    qs = TicketDelivery.objects.filter(status="DEAD")
+    if order_numbers:
+        qs = qs.filter(order_number__in=order_numbers)
+    return qs.update(status="PENDING", attempts=0, next_attempt_at=timezone.now())
@@ -0,0 +1,67 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from tickets.models import SeatHold
+
+
+def hold_ttl():
+    return timedelta(seconds=getattr(settings, "SEAT_HOLD_TTL", 600))
+
+
+def active_held_seat_ids(screening_id, exclude_token=None, now=None):
+    """Miejsca seansu zablokowane w tej chwili (indeks screening_id, expires_at)."""
+    qs = SeatHold.objects.filter(screening_id=screening_id, expires_at__gt=now or timezone.now())
+    if exclude_token:
+        qs = qs.exclude(token=exclude_token)
+    return set(qs.values_list("seat_id", flat=True))
+
+
+def create_hold(screening_id, seat_ids, token=None):
+    """
+    Blokuje miejsca na czas hold_ttl(). Ponowne wywołanie z tym samym tokenem
+    zastępuje poprzedni wybór miejsc. Konflikt z cudzą blokadą zgłasza
+    unikalny indeks (screening, seat) jako IntegrityError.
+    """
+    now = timezone.now()
+    token = token or uuid.uuid4().hex
+    expires_at = now + hold_ttl()
+
+    with transaction.atomic():
+        SeatHold.objects.filter(screening_id=screening_id, token=token).delete()
+        # wygasłe, jeszcze nieposprzątane blokady nie mogą blokować miejsc
+        SeatHold.objects.filter(
+            screening_id=screening_id, seat_id__in=seat_ids, expires_at__lte=now
+        ).delete()
+        SeatHold.objects.bulk_create([
+            SeatHold(screening_id=screening_id, seat_id=seat_id, token=token, expires_at=expires_at)
+            for seat_id in seat_ids
+        ])
+
+    return token, expires_at
+
+
+def release_hold(token, screening_id=None):
+    qs = SeatHold.objects.filter(token=token)
+    if screening_id is not None:
+        qs = qs.filter(screening_id=screening_id)
+    deleted, _ = qs.delete()
+    return deleted
+
+
+def expire_holds(batch_size=5000, now=None):
+    """Usuwa wygasłe blokady paczkami, zwraca liczbę usuniętych wierszy."""
+    now = now or timezone.now()
+    total = 0
+    while True:
+        ids = list(
+            SeatHold.objects.filter(expires_at__lte=now)
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return total
+        deleted, _ = SeatHold.objects.filter(id__in=ids).delete()
+        total += deleted
@@ -0,0 +1,149 @@
+import base64
+import binascii
+import csv
+import json
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from tickets.models import Ticket
+
+# kolejność rejestru sprzedaży - klucz kursora
+ORDERING = ("purchased_at", "id")
+
+# kolumny zapytania -> klucze wiersza odpowiedzi
+FIELDS = {
+    "id": "id",
+    "order_number": "order_number",
+    "purchased_at": "purchased_at",
+    "total_price": "total_price",
+    "payment_status": "payment_status",
+    "type": "type__name",
+    "screening_id": "screening_id",
+    "movie_title": "screening__movie__title",
+    "seats_count": "seats_count",
+    "user_id": "user_id",
+}
+
+
+# eksport: wiersze czytane z bazy porcjami, odpowiedź składana w kawałki ~64 KiB
+EXPORT_CHUNK_ROWS = 2000
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def with_seats_count(queryset):
+    """
+    Jedna adnotacja seats_count dla listy i filtrów. Podzapytanie zamiast JOIN + GROUP BY,
+    żeby baza mogła czytać bilety po indeksie (purchased_at, id) i zatrzymać się po LIMIT.
+    """
+    if "seats_count" in queryset.query.annotations:
+        return queryset
+    seats = (
+        Ticket.seats.through.objects.filter(ticket_id=OuterRef("pk"))
+        .order_by()
+        .values("ticket_id")
+        .annotate(n=Count("*"))
+        .values("n")
+    )
+    return queryset.annotate(seats_count=Coalesce(Subquery(seats, output_field=IntegerField()), 0))
+
+
+def ledger_rows(queryset):
+    """Zapytanie zwracające gotowe wiersze (słowniki), bez tworzenia obiektów modeli."""
+    return with_seats_count(queryset).order_by(*ORDERING).values(*FIELDS.values())
+
+
+def to_row(values):
+    row = {key: values[column] for key, column in FIELDS.items()}
+    row["total_price"] = str(row["total_price"])
+    return row
+
+
+def encode_cursor(row):
+    raw = f"{row['purchased_at'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        purchased_at, ticket_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return datetime.fromisoformat(purchased_at), int(ticket_id)
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def keyset_page(rows, cursor=None, page_size=500):
+    """
+    Strona rejestru po (purchased_at, id) > kursor. Koszt nie zależy od numeru strony -
+    zapytanie zaczyna od pozycji kursora w indeksie zamiast pomijać OFFSET wierszy.
+    Zwraca (wiersze, kursor następnej strony albo None).
+    """
+    if cursor:
+        purchased_at, ticket_id = decode_cursor(cursor)
+        # warunek purchased_at >= ... wyznacza początek zakresu indeksu, OR rozstrzyga remisy
+        rows = rows.filter(purchased_at__gte=purchased_at).filter(
+            Q(purchased_at__gt=purchased_at) | Q(id__gt=ticket_id)
+        )
+
+    page = list(rows[:page_size + 1])
+    next_cursor = encode_cursor(page[page_size - 1]) if len(page) > page_size else None
+    return [to_row(values) for values in page[:page_size]], next_cursor
+
+
+class _Line:
+    """Bufor dla csv.writer - writerow() zwraca od razu zapisaną linię."""
+
+    def write(self, value):
+        return value
+
+
+def _iter_rows(rows):
+    for values in rows.iterator(chunk_size=EXPORT_CHUNK_ROWS):
+        yield to_row(values)
+
+
+def _chunked(lines):
+    buf, size = [], 0
+    for line in lines:
+        buf.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield "".join(buf)
+            buf, size = [], 0
+    if buf:
+        yield "".join(buf)
+
+
+def iter_csv(rows):
+    """Rejestr jako CSV (średnik jak w eksporcie z panelu), strumieniowo."""
+    encoder = DjangoJSONEncoder()
+    writer = csv.writer(_Line(), delimiter=";")
+
+    def lines():
+        yield writer.writerow(FIELDS.keys())
+        for row in _iter_rows(rows):
+            yield writer.writerow(
+                encoder.default(value) if isinstance(value, datetime) else value
+                for value in row.values()
+            )
+
+    return _chunked(lines())
+
+
+def iter_ndjson(rows):
+    """Rejestr jako NDJSON - jeden obiekt JSON na linię, strumieniowo."""
+    return _chunked(
+        json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n" for row in _iter_rows(rows)
+    )
+
+
+EXPORTERS = {
+    "csv": (iter_csv, "text/csv; charset=utf-8", "csv"),
+    "ndjson": (iter_ndjson, "application/x-ndjson", "ndjson"),
+}
@@ -0,0 +1,135 @@
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.db import connections
+
+from tickets.models import Ticket
+from tickets.services.pdf_worker import init_worker, render_order
+
+CHUNK_SIZE = 64 * 1024
+
+
+def batch_order_numbers(order_numbers=None, screening_id=None):
+    """Numery istniejących zamówień z listy lub wszystkich zamówień seansu, bez duplikatów."""
+    qs = Ticket.objects.all()
+    if order_numbers:
+        qs = qs.filter(order_number__in=order_numbers)
+    if screening_id is not None:
+        qs = qs.filter(screening_id=screening_id)
+    return list(qs.order_by("order_number").values_list("order_number", flat=True).distinct())
+
+
+class _ZipStream:
+    """Strumień bez seek dla zipfile - zapisane bajty są odbierane kawałkami przez pop()."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _worker_count():
+    return min(settings.TICKET_PDF_BATCH_WORKERS or os.cpu_count() or 1, settings.TICKET_PDF_BATCH_MAX_WORKERS)
+
+
+def _new_pool(workers):
+    # procesy potomne otwierają własne połączenia z bazą
+    connections.close_all()
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+    )
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def shared_pool():
+    """
+    Jedna pula procesów na proces serwera, tworzona przy pierwszym użyciu. Równoległe
+    żądania dzielą TICKET_PDF_BATCH_MAX_WORKERS procesów zamiast uruchamiać własne pule.
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = _new_pool(_worker_count())
+        return _shared_pool
+
+
+def _discard_shared_pool(pool):
+    # po awarii procesu potomnego pula jest bezużyteczna - następne żądanie tworzy nową
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is pool:
+            _shared_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _rendered(order_numbers, workers):
+    """(numer zamówienia, ścieżka, błąd) w kolejności zamówień; małe paczki bez puli procesów."""
+    if workers is None and len(order_numbers) <= settings.TICKET_PDF_BATCH_INLINE_ORDERS:
+        for order_number in order_numbers:
+            yield render_order(order_number)
+        return
+
+    own_pool = workers is not None
+    pool = _new_pool(workers) if own_pool else shared_pool()
+    futures = [pool.submit(render_order, order_number) for order_number in order_numbers]
+    try:
+        for future in futures:
+            yield future.result()
+    except BrokenProcessPool:
+        if not own_pool:
+            _discard_shared_pool(pool)
+        raise
+    finally:
+        # przerwane pobieranie nie czeka na resztę renderów
+        for future in futures:
+            future.cancel()
+        if own_pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_orders_zip(order_numbers, workers=None):
+    """
+    Renderuje zamówienia równolegle i oddaje archiwum ZIP kawałkami. Bez `workers` używa
+    współdzielonej puli procesów (małe paczki renderuje w bieżącym procesie), z `workers` -
+    własnej puli tej wielkości. W pamięci jest najwyżej jeden kawałek pliku PDF,
+    gotowe dokumenty czytamy z cache na dysku.
+    """
+    stream = _ZipStream()
+    archive = zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_STORED)
+    errors = []
+
+    for order_number, path, error in _rendered(order_numbers, workers):
+        if error:
+            errors.append(f"{order_number}: {error}")
+            continue
+
+        with open(path, "rb") as src, archive.open(f"tickets_{order_number}.pdf", "w") as dest:
+            while chunk := src.read(CHUNK_SIZE):
+                dest.write(chunk)
+                yield stream.pop()
+        yield stream.pop()
+
+    if errors:
+        archive.writestr("errors.txt", "\n".join(errors) + "\n")
+    archive.close()
+    yield stream.pop()
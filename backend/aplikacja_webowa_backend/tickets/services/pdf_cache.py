@@ -0,0 +1,94 @@
+import hashlib
+import os
+import tempfile
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.template.loader import get_template
+
+from tickets.services.pdf_render import RENDERERS
+from tickets.services.render_assets import ASSETS_DIRNAME
+from tickets.templates.tickets.logo_base64 import LOGO_BASE64
+
+TEMPLATE_NAME = "tickets/ticket_pdf.html"
+
+
+def cache_dir():
+    return settings.TICKET_PDF_CACHE_DIR
+
+
+@lru_cache(maxsize=None)
+def template_version():
+    """Skrót szablonu biletu i logo - zmiana szablonu daje nowe klucze, stare pliki przestają być używane."""
+    origin = get_template(TEMPLATE_NAME).origin
+    h = hashlib.sha256()
+    with open(origin.name, "rb") as f:
+        h.update(f.read())
+    h.update(LOGO_BASE64.encode())
+    return h.hexdigest()
+
+
+def order_digest(order_number, tickets):
+    """Klucz pliku: skrót wszystkiego, co trafia do PDF zamówienia, oraz wersji szablonu i silnika."""
+    h = hashlib.sha256()
+    h.update(template_version().encode())
+    # silnik i wersja jego kodu - układ reportlab nie korzysta z szablonu
+    h.update(RENDERERS[settings.TICKET_PDF_ENGINE].layout_version().encode())
+    h.update(order_number.encode())
+
+    screening = tickets[0].screening
+    h.update(f"|{screening.id}|{screening.start_time.isoformat()}|{screening.movie}|{screening.auditorium}".encode())
+
+    for t in sorted(tickets, key=lambda t: t.id):
+        h.update(
+            f"|{t.id}|{t.type.name}|{t.total_price}|{t.first_name}|{t.last_name}"
+            f"|{t.email}|{t.phone_number}".encode()
+        )
+        for seat in sorted(t.seats.all(), key=lambda s: s.id):
+            h.update(f"|{seat.row_number}-{seat.seat_number}".encode())
+    return h.hexdigest()
+
+
+def cached_path(digest):
+    return os.path.join(cache_dir(), digest[:2], f"{digest}.pdf")
+
+
+def get_cached_pdf(digest):
+    path = cached_path(digest)
+    return path if os.path.exists(path) else None
+
+
+def store_pdf(digest, pdf_bytes):
+    """Zapis atomowy (plik tymczasowy + rename), równoległe żądania nie widzą połowy pliku."""
+    path = cached_path(digest)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf_bytes)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return path
+
+
+def prune(max_age_seconds, now=None):
+    """Usuwa pliki starsze niż max_age_seconds (m.in. wyrenderowane starą wersją szablonu), poza zasobami procesów."""
+    now = now or time.time()
+    removed = 0
+    root = cache_dir()
+    if not os.path.isdir(root):
+        return 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        if dirpath == root and ASSETS_DIRNAME in dirnames:
+            # logo i inne zasoby procesów - ścieżki do nich są trzymane w pamięci
+            dirnames.remove(ASSETS_DIRNAME)
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if now - os.path.getmtime(path) > max_age_seconds:
+                os.unlink(path)
+                removed += 1
+    return removed
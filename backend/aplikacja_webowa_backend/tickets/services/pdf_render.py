@@ -0,0 +1,273 @@
+import hashlib
+import inspect
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.template.loader import render_to_string
+from django.utils import timezone
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.platypus import Flowable, Image, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from tickets.services.render_assets import get_assets, qr_file, qr_matrix
+
+TEMPLATE_NAME = "tickets/ticket_pdf.html"
+
+
+class PDFRenderError(Exception):
+    pass
+
+
+def build_ticket_context(tickets, order_number):
+    """Dane biletu wspólne dla wszystkich silników (bez HTML)."""
+    tickets = list(tickets)
+    first_ticket = tickets[0]
+
+    tickets_data = []
+    for t in tickets:
+        for seat in t.seats.all():
+            tickets_data.append({
+                "ticket_id": t.id,
+                "row_number": seat.row_number,
+                "seat_number": seat.seat_number,
+                "ticket_type": t.type.name,
+                "total_price": t.total_price,
+            })
+
+    return {
+        "order_number": order_number,
+        "tickets_data": tickets_data,
+        "screening": first_ticket.screening,
+        "customer": {
+            "first_name": first_ticket.first_name,
+            "last_name": first_ticket.last_name,
+            "email": first_ticket.email,
+            "phone": first_ticket.phone_number,
+        },
+        "qr_payload": f"{order_number}",
+    }
+
+
+class TicketRenderer:
+    """Silnik PDF biletów: render(context) -> bytes, błąd zgłasza PDFRenderError."""
+
+    name = None
+    # pomocnicze klasy/funkcje, których kod też wyznacza wygląd PDF (poza samym silnikiem)
+    layout = ()
+
+    @classmethod
+    def available(cls):
+        return True
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def layout_version(cls):
+        """
+        Skrót kodu silnika (z klasami bazowymi) i `layout` - wchodzi do klucza cache PDF,
+        więc zmiana układu rysowanego w kodzie, nie w szablonie, też daje nowe pliki.
+        """
+        h = hashlib.sha256(cls.name.encode())
+        for source in [klass for klass in cls.__mro__ if issubclass(klass, TicketRenderer)] + list(cls.layout):
+            h.update(inspect.getsource(source).encode())
+        return h.hexdigest()
+
+    def render(self, context, request=None):
+        raise NotImplementedError
+
+
+class _HTMLRenderer(TicketRenderer):
+    """Silniki renderujące szablon ticket_pdf.html."""
+
+    # pisa korzysta z fontu zarejestrowanego w RenderAssets i czyta pliki po ścieżce,
+    # weasyprint potrzebuje @font-face i adresów file://
+    embed_font = False
+
+    def html(self, context, request=None):
+        assets = get_assets()
+        qr_path = qr_file(context["qr_payload"])
+        return render_to_string(TEMPLATE_NAME, {
+            **context,
+            "MEDIA_URL": settings.MEDIA_URL,
+            "logo_src": assets.logo_uri if self.embed_font else assets.logo_path,
+            "dejavu_sans_abs_url": assets.font_uri if self.embed_font else "",
+            "STATIC_URL": settings.STATIC_URL,
+            "qr_src": Path(qr_path).as_uri() if self.embed_font else qr_path,
+            "request": request,
+        })
+
+
+class PisaRenderer(_HTMLRenderer):
+    name = "pisa"
+
+    def render(self, context, request=None):
+        from xhtml2pdf import pisa
+
+        pdf_buffer = BytesIO()
+        pisa_status = pisa.CreatePDF(self.html(context, request), dest=pdf_buffer)
+        if pisa_status.err:
+            raise PDFRenderError("xhtml2pdf zgłosił błąd renderowania")
+        return pdf_buffer.getvalue()
+
+
+class WeasyPrintRenderer(_HTMLRenderer):
+    name = "weasyprint"
+    embed_font = True
+
+    @classmethod
+    def available(cls):
+        # weasyprint wymaga bibliotek systemowych (pango), sam pakiet nie wystarczy
+        try:
+            import weasyprint  # noqa: F401
+        except (ImportError, OSError):
+            return False
+        return True
+
+    def render(self, context, request=None):
+        from weasyprint import HTML
+
+        try:
+            return HTML(string=self.html(context, request)).write_pdf()
+        except Exception as exc:
+            raise PDFRenderError(str(exc)) from exc
+
+
+class QRCodeFlowable(Flowable):
+    """Kod QR rysowany wektorowo jako jedna ścieżka z poziomych odcinków modułów."""
+
+    def __init__(self, payload, size):
+        super().__init__()
+        self.matrix = qr_matrix(payload)
+        self.width = self.height = size
+
+    def draw(self):
+        modules = len(self.matrix)
+        unit = self.width / modules
+        path = self.canv.beginPath()
+        for y, row in enumerate(self.matrix):
+            top = self.height - (y + 1) * unit
+            x = 0
+            while x < modules:
+                if not row[x]:
+                    x += 1
+                    continue
+                start = x
+                while x < modules and row[x]:
+                    x += 1
+                path.rect(start * unit, top, (x - start) * unit, unit)
+        self.canv.drawPath(path, stroke=0, fill=1)
+
+
+class ReportLabRenderer(TicketRenderer):
+    """Układ ticket_pdf.html rysowany bezpośrednio w reportlab, bez parsowania HTML/CSS."""
+
+    name = "reportlab"
+    layout = (QRCodeFlowable,)
+
+    def _styles(self):
+        base = ParagraphStyle("base", fontName="DejaVuSans", fontSize=10.5, leading=13)
+        return {
+            "h1": ParagraphStyle("h1", parent=base, fontSize=19.5, leading=24, alignment=TA_CENTER),
+            "h2": ParagraphStyle("h2", parent=base, fontSize=13.5, leading=17, alignment=TA_CENTER),
+            "h3": ParagraphStyle("h3", parent=base, fontSize=12, leading=15, spaceBefore=6),
+            "info": base,
+            "small": ParagraphStyle("small", parent=base, fontSize=8.25, leading=10, alignment=TA_CENTER),
+        }
+
+    def _logo(self, assets):
+        width, height = assets.logo_size
+        return Image(BytesIO(assets.logo_jpeg), width=105, height=105 * height / width)
+
+    def render(self, context, request=None):
+        assets = get_assets()
+        styles = self._styles()
+        screening = context["screening"]
+        customer = context["customer"]
+        start_time = timezone.localtime(screening.start_time).strftime("%d.%m.%Y %H:%M")
+
+        info_rows = [
+            ("Imie i nazwisko:", f"{customer['first_name']} {customer['last_name']}"),
+            ("Email:", customer["email"]),
+            ("Film:", screening.movie.title),
+            ("Start seansu:", start_time),
+            ("Sala:", screening.auditorium.name),
+        ]
+        info = Table(
+            [[Paragraph(f"<b>{escape(label)}</b> {escape(str(value))}", styles["info"])] for label, value in info_rows],
+            colWidths=["100%"],
+        )
+        info.setStyle(TableStyle([
+            ("BOX", (0, 0), (-1, -1), 0.75, colors.black),
+            ("TOPPADDING", (0, 0), (-1, -1), 2),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
+        ]))
+
+        seats = Table(
+            [["Bilet ID", "Rzad", "Miejsce", "Rodzaj biletu", "Cena"]] + [
+                [item["ticket_id"], item["row_number"], item["seat_number"], item["ticket_type"], f"{item['total_price']} zl"]
+                for item in context["tickets_data"]
+            ],
+            colWidths=["20%"] * 5,
+            repeatRows=1,
+        )
+        seats.setStyle(TableStyle([
+            ("FONTNAME", (0, 0), (-1, -1), "DejaVuSans"),
+            ("FONTSIZE", (0, 0), (-1, -1), 10.5),
+            ("GRID", (0, 0), (-1, -1), 0.75, colors.black),
+            ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ]))
+
+        logo = self._logo(assets)
+        logo.hAlign = "CENTER"
+        qr = QRCodeFlowable(context["qr_payload"], 105)
+        qr.hAlign = "CENTER"
+
+        story = [
+            logo,
+            Paragraph("Last Kino", styles["h1"]),
+            Paragraph(f"Zamowienie: {escape(context['order_number'])}", styles["h2"]),
+            Spacer(1, 9),
+            info,
+            Paragraph("Twoje miejsca:", styles["h3"]),
+            Spacer(1, 6),
+            seats,
+            Spacer(1, 15),
+            qr,
+            Paragraph("Zeskanuj przy wejsciu", styles["small"]),
+            Spacer(1, 6),
+            Paragraph("Dziekujemy za zakup w Last Kino", styles["small"]),
+            Paragraph("Prosimy o okazanie biletu obsludze", styles["small"]),
+        ]
+
+        buffer = BytesIO()
+        doc = SimpleDocTemplate(
+            buffer, pagesize=A4, leftMargin=24, rightMargin=24, topMargin=24, bottomMargin=24,
+            title=f"Bilety {context['order_number']}",
+        )
+        try:
+            doc.build(story)
+        except Exception as exc:
+            raise PDFRenderError(str(exc)) from exc
+        return buffer.getvalue()
+
+
+RENDERERS = {
+    renderer.name: renderer
+    for renderer in (PisaRenderer, ReportLabRenderer, WeasyPrintRenderer)
+}
+
+
+def get_renderer(name=None):
+    name = name or settings.TICKET_PDF_ENGINE
+    renderer = RENDERERS.get(name)
+    if renderer is None:
+        raise ImproperlyConfigured(f"Nieznany silnik PDF biletów: {name} (dostępne: {', '.join(RENDERERS)})")
+    if not renderer.available():
+        raise ImproperlyConfigured(f"Silnik PDF biletów {name} nie jest dostępny w tym środowisku")
+    return renderer()
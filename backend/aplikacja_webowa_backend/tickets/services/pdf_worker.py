@@ -0,0 +1,46 @@
+"""
+Funkcje procesów roboczych zbiorczego renderowania PDF. Moduł jest importowany
+przez proces potomny (spawn) przed django.setup(), dlatego importy Django i modeli
+są wewnątrz funkcji.
+"""
+
+
+def init_worker():
+    # proces potomny (spawn) startuje bez Django - konfigurujemy go raz i rozgrzewamy silnik PDF
+    import django
+
+    django.setup()
+
+    from tickets.services.pdf_render import get_renderer
+    from tickets.services.render_assets import get_assets
+
+    get_assets()
+    get_renderer()
+
+
+def render_order(order_number):
+    """
+    Renderuje PDF zamówienia w procesie roboczym i zwraca ścieżkę pliku w cache PDF,
+    dzięki czemu między procesami nie są przesyłane całe dokumenty.
+    """
+    from tickets.models import Ticket
+    from tickets.services.pdf_cache import get_cached_pdf, order_digest, store_pdf
+    from tickets.services.pdf_render import PDFRenderError, build_ticket_context, get_renderer
+
+    tickets = list(
+        Ticket.objects.filter(order_number=order_number)
+        .select_related("screening__movie", "screening__auditorium", "type")
+        .prefetch_related("seats")
+    )
+    if not tickets:
+        return order_number, None, "zamówienie nie istnieje"
+
+    digest = order_digest(order_number, tickets)
+    path = get_cached_pdf(digest)
+    if path is None:
+        try:
+            pdf = get_renderer().render(build_ticket_context(tickets, order_number))
+        except PDFRenderError as exc:
+            return order_number, None, str(exc)
+        path = store_pdf(digest, pdf)
+    return order_number, path, None
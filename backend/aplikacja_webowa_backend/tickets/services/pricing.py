@@ -1,32 +1,121 @@
-from tickets.models import PromotionRule
+import logging
 
-def calculate_price_with_promotion(seats, ticket_type, screening):
-    seats_count = len(seats)
-    base_price = ticket_type.price * seats_count
+from django.utils import timezone
 
-    applicable_promos = [
-        p for p in PromotionRule.objects.all()
-        if p.matches(seats_count, ticket_type, screening)
-    ]
+from tickets.services.promotions import get_promotion_index
+
+# INFO - decyzja cenowa dla każdej wyceny, DEBUG - dodatkowo ślad oceny reguł promocji.
+# Poziom sprawdzamy przed zbudowaniem rekordu, więc wyłączony logger nic nie formatuje
+# i nie sięga do relacji modeli (w logu są tylko id).
+logger = logging.getLogger("tickets.pricing")
+
+
+class Quote:
+    """Wycena jednej pozycji koszyka: seats_count biletów jednego typu na jeden seans."""
+
+    __slots__ = ("ticket_type", "seats_count", "base_price", "final_price", "promotion")
 
-    if not applicable_promos:
+    def __init__(self, ticket_type, seats_count, base_price, final_price, promotion):
+        self.ticket_type = ticket_type
+        self.seats_count = seats_count
+        self.base_price = base_price
+        self.final_price = final_price
+        self.promotion = promotion
+
+    def as_dict(self):
+        """Kształt odpowiedzi check-promotion/."""
+        promotion = None
+        if self.promotion is not None:
+            promotion = {
+                "id": self.promotion.id,
+                "name": self.promotion.name,
+                "discount_percent": self.promotion.discount_percent,
+            }
         return {
-            "base_price": base_price,
-            "final_price": base_price,
-            "promotion": None
+            "base_price": self.base_price,
+            "final_price": self.final_price,
+            "promotion": promotion,
         }
 
-    best = max(applicable_promos, key=lambda p: p.discount_percent)
 
-    discount = base_price * (best.discount_percent / 100)
-    final_price = round(base_price - discount, 2)
+def _trace(index, screening, ticket_type, seats_count, now):
+    return [
+        {"rule_id": rule.id, "discount_percent": str(rule.discount_percent), "rejected": reason}
+        for rule, reason in index.explain(seats_count, ticket_type, screening, now)
+    ]
 
-    return {
-        "base_price": base_price,
-        "final_price": final_price,
-        "promotion": {
-            "id": best.id,
-            "name": best.name,
-            "discount_percent": best.discount_percent
-        }
+
+def _log_quote(quote, screening, index, now):
+    if not logger.isEnabledFor(logging.INFO):
+        return
+
+    record = {
+        "screening_id": screening.id,
+        "ticket_type_id": quote.ticket_type.id,
+        "seats_count": quote.seats_count,
+        "base_price": str(quote.base_price),
+        "final_price": str(quote.final_price),
+        "promotion_id": quote.promotion.id if quote.promotion is not None else None,
+        "promotion_version": index.version,
     }
+    logger.info(
+        "quote screening=%s ticket_type=%s seats=%s final=%s promotion=%s",
+        record["screening_id"], record["ticket_type_id"], record["seats_count"],
+        record["final_price"], record["promotion_id"],
+        extra={"pricing": record},
+    )
+    if logger.isEnabledFor(logging.DEBUG):
+        trace = _trace(index, screening, quote.ticket_type, quote.seats_count, now)
+        logger.debug(
+            "quote trace screening=%s ticket_type=%s seats=%s rules=%s",
+            record["screening_id"], record["ticket_type_id"], record["seats_count"], trace,
+            extra={"pricing": dict(record, trace=trace)},
+        )
+
+
+def _quote(screening, ticket_type, seats_count, index, now):
+    base_price = ticket_type.price * seats_count
+
+    best = None
+    for p in index.applicable(seats_count, ticket_type, screening, now):
+        # przy remisie wygrywa reguła o niższym id, jak max() po regułach w kolejności id
+        if best is None or p.discount_percent > best.discount_percent:
+            best = p
+
+    if best is None:
+        final_price = round(base_price, 2)
+    else:
+        # rabat liczony od sumy i zaokrąglany raz, na końcu
+        final_price = round(base_price * (1 - best.discount_percent / 100), 2)
+
+    result = Quote(ticket_type, seats_count, base_price, final_price, best)
+    _log_quote(result, screening, index, now)
+    return result
+
+
+def quote_basket(screening, items, index=None, now=None):
+    """
+    Wycenia koszyk pozycji (ticket_type, seats_count) na jeden seans.
+
+    Cały koszyk jest liczony na jednym snapshocie indeksu promocji i jednej chwili
+    `now`, więc pozycje jednego zamówienia nie mogą trafić na różne zestawy reguł.
+    Powtarzające się pozycje są wyceniane raz. Zwraca listę Quote w kolejności `items`.
+    """
+    if index is None:
+        index = get_promotion_index()
+    if now is None:
+        now = timezone.now()
+
+    quotes = {}
+    result = []
+    for ticket_type, seats_count in items:
+        key = (ticket_type.id, seats_count)
+        if key not in quotes:
+            quotes[key] = _quote(screening, ticket_type, seats_count, index, now)
+        result.append(quotes[key])
+    return result
+
+
+def quote(screening, ticket_type, seats_count, index=None, now=None):
+    """Wycena pojedynczej pozycji."""
+    return quote_basket(screening, [(ticket_type, seats_count)], index, now)[0]
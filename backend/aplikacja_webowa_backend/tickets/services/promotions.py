@@ -0,0 +1,182 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from tickets.models import PromotionRule
+
+VERSION_KEY = "promotions:version"
+
+
+def _timeout():
+    return getattr(settings, "PROMOTION_INDEX_TIMEOUT", 60)
+
+
+class CompiledRule:
+    """Reguła promocji bez odwołań do ORM - warunki sprawdzane w lookupie indeksu."""
+
+    __slots__ = ("rule", "position", "discount_percent", "min_tickets", "time_from", "time_to", "valid_from", "valid_to")
+
+    def __init__(self, rule, position):
+        self.rule = rule
+        self.position = position
+        self.discount_percent = rule.discount_percent
+        self.min_tickets = rule.min_tickets
+        self.time_from = rule.time_from
+        self.time_to = rule.time_to
+        self.valid_from = rule.valid_from
+        self.valid_to = rule.valid_to
+
+    def accepts(self, seats_count, screening_time, now):
+        if not (self.valid_from <= now <= self.valid_to):
+            return False
+        if self.time_from and self.time_to and not (self.time_from <= screening_time <= self.time_to):
+            return False
+        if self.min_tickets and seats_count < self.min_tickets:
+            return False
+        return True
+
+    def rejection(self, seats_count, screening_time, now):
+        """Powód odrzucenia reguły albo None - tylko do śladu wyceny, accepts() jest szybsze."""
+        if not (self.valid_from <= now <= self.valid_to):
+            return "validity"
+        if self.time_from and self.time_to and not (self.time_from <= screening_time <= self.time_to):
+            return "time_window"
+        if self.min_tickets and seats_count < self.min_tickets:
+            return "min_tickets"
+        return None
+
+
+class PromotionIndex:
+    """
+    Reguły promocji pogrupowane po (screening_id, ticket_type_id, weekday, godzina).
+    None w kluczu oznacza regułę bez danego ograniczenia. Lookup sprawdza najwyżej
+    16 kubełków, w każdym tylko reguły, których klucz już pasuje do zapytania.
+
+    Wynik jest taki sam jak max(discount_percent) po PromotionRule.matches() dla
+    reguł w kolejności id (przy remisie wygrywa reguła o niższym id).
+    """
+
+    __slots__ = ("version", "buckets", "size", "next_change")
+
+    def __init__(self, version, rules, now=None):
+        now = now or timezone.now()
+        self.version = version
+        self.buckets = {}
+        self.size = 0
+        # najbliższa chwila, w której któraś reguła zacznie lub przestanie obowiązywać
+        self.next_change = None
+
+        for position, rule in enumerate(rules):
+            # reguła, która już wygasła, nigdy więcej nie zostanie dopasowana
+            if rule.valid_to < now:
+                continue
+
+            change = rule.valid_from if rule.valid_from > now else rule.valid_to
+            if self.next_change is None or change < self.next_change:
+                self.next_change = change
+
+            if rule.time_from and rule.time_to:
+                if rule.time_from > rule.time_to:
+                    # okno przez północ nigdy nie pasuje w matches()
+                    continue
+                hours = range(rule.time_from.hour, rule.time_to.hour + 1)
+            else:
+                hours = (None,)
+
+            compiled = CompiledRule(rule, position)
+            for hour in hours:
+                key = (rule.screening_id, rule.ticket_type_id, rule.weekday, hour)
+                self.buckets.setdefault(key, []).append(compiled)
+            self.size += 1
+
+    def __len__(self):
+        return self.size
+
+    def _candidates(self, ticket_type, screening):
+        """Reguły z kubełków, których klucz pasuje do zapytania (ta sama reguła może wystąpić kilka razy)."""
+        start_time = screening.start_time
+        screening_time = start_time.replace(second=0, microsecond=0).time()
+
+        screening_keys = (screening.id, None)
+        ticket_type_keys = (ticket_type.id, None) if ticket_type is not None else (None,)
+        weekday_keys = (start_time.weekday() + 1, None)
+        hour_keys = (screening_time.hour, None)
+
+        candidates = []
+        for s in screening_keys:
+            for t in ticket_type_keys:
+                for w in weekday_keys:
+                    for h in hour_keys:
+                        candidates.extend(self.buckets.get((s, t, w, h), ()))
+        return screening_time, candidates
+
+    def applicable(self, seats_count, ticket_type, screening, now=None):
+        """Reguły pasujące do zapytania, w kolejności id (jak PromotionRule.objects.all())."""
+        if screening is None:
+            return []
+
+        now = now or timezone.now()
+        screening_time, candidates = self._candidates(ticket_type, screening)
+        found = {}
+        for compiled in candidates:
+            if compiled.accepts(seats_count, screening_time, now):
+                found[compiled.position] = compiled.rule
+        return [found[position] for position in sorted(found)]
+
+    def explain(self, seats_count, ticket_type, screening, now=None):
+        """
+        Ślad oceny reguł: [(reguła, powód odrzucenia albo None)] w kolejności id.
+        Obejmuje reguły z pasujących kubełków - pozostałe odpadły już na kluczu.
+        """
+        if screening is None:
+            return []
+
+        now = now or timezone.now()
+        screening_time, candidates = self._candidates(ticket_type, screening)
+        found = {}
+        for compiled in candidates:
+            found[compiled.position] = (compiled.rule, compiled.rejection(seats_count, screening_time, now))
+        return [found[position] for position in sorted(found)]
+
+    def best(self, seats_count, ticket_type, screening, now=None):
+        """Najlepsza promocja albo None."""
+        best = None
+        for rule in self.applicable(seats_count, ticket_type, screening, now):
+            if best is None or rule.discount_percent > best.discount_percent:
+                best = rule
+        return best
+
+
+def build_index(version=None):
+    rules = PromotionRule.objects.order_by("id")
+    return PromotionIndex(version, rules)
+
+
+def get_promotion_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, _timeout())
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+# indeks trzymany w pamięci procesu, ważny dopóki zgadza się wersja z cache
+_index = None
+
+
+def get_promotion_index():
+    global _index
+    version = get_promotion_version()
+    index = _index
+    if index is None or index.version != version:
+        index = _index = build_index(version)
+    return index
+
+
+def invalidate_promotions():
+    """Nowa wersja reguł - każdy proces przebuduje indeks przy następnym lookupie."""
+    global _index
+    cache.set(VERSION_KEY, uuid.uuid4().hex, _timeout())
+    _index = None
@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils import timezone
+
+from screenings.models import Screening
+from auditorium.layout import get_layout
+from tickets.models import TicketType
+from tickets.services.pricing import quote
+from tickets.services.promotions import get_promotion_index
+
+
+class QuoteCache:
+    """
+    LRU z TTL w pamięci procesu. Wpisy wygasają po `ttl` sekundach albo wcześniej,
+    jeśli podano własny termin; przy przekroczeniu `maxsize` wypada najdawniej używany.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if self.maxsize <= 0 or ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+_quotes = QuoteCache(settings.QUOTE_CACHE_SIZE, settings.QUOTE_CACHE_TTL)
+# seans i typ biletu potrzebne do wyceny, osobno - liczniki dotyczą tylko wycen
+_contexts = QuoteCache(settings.QUOTE_CACHE_SIZE, settings.QUOTE_CACHE_TTL)
+
+
+def get_quote_cache():
+    return _quotes
+
+
+def _ttl(index):
+    # wycena jest ważna najwyżej do chwili, w której zmienia się zestaw aktywnych reguł
+    if index.next_change is None:
+        return None
+    return (index.next_change - timezone.now()).total_seconds()
+
+
+def cached_quote(screening_id, ticket_type_id, seats_data):
+    """
+    Odpowiedź check-promotion/ z cache procesu. Klucz: (seans, typ biletu, liczba
+    miejsc, wersja promocji) - zmiana reguł, seansu lub typu biletu zmienia wersję,
+    więc stare wpisy przestają być osiągalne. Zwraca (dane, trafienie).
+    Rzuca Screening.DoesNotExist / TicketType.DoesNotExist.
+    """
+    index = get_promotion_index()
+
+    context_key = (screening_id, ticket_type_id, index.version)
+    context = _contexts.get(context_key)
+    if context is None:
+        screening = Screening.objects.get(id=screening_id)
+        ticket_type = TicketType.objects.get(id=ticket_type_id)
+        context = (screening, ticket_type)
+        _contexts.set(context_key, context)
+    screening, ticket_type = context
+
+    # miejsca spoza układu sali są pomijane, jak dotąd
+    layout = get_layout(screening.auditorium_id)
+    seats_count = sum(
+        1 for s in seats_data if layout.resolve(s["row_number"], s["seat_number"]) is not None
+    )
+
+    key = (screening_id, ticket_type_id, seats_count, index.version)
+    data = _quotes.get(key)
+    if data is not None:
+        return data, True
+
+    data = quote(screening, ticket_type, seats_count, index).as_dict()
+    _quotes.set(key, data, _ttl(index))
+    return data, False
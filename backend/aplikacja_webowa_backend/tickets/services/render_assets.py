@@ -0,0 +1,140 @@
+import base64
+import hashlib
+import os
+import tempfile
+import threading
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+
+import qrcode
+from django.conf import settings
+from PIL import Image
+from reportlab import rl_config
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+from tickets.templates.tickets.logo_base64 import LOGO_BASE64
+
+# zasoby procesu w katalogu cache PDF; prune_ticket_pdf_cache go pomija, bo procesy trzymają do nich ścieżki
+ASSETS_DIRNAME = "assets"
+# obrazy QR zamówień - zwykłe pliki cache, usuwane przez prune i odtwarzane przy potrzebie
+QR_DIRNAME = "qr"
+
+FONT_NAME = "DejaVuSans"
+FONT_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates", "tickets", "DejaVuSans.ttf")
+
+
+class RenderAssets:
+    """
+    Zasoby renderowania biletów przygotowywane raz na proces: font DejaVuSans
+    zarejestrowany w reportlab (i widoczny dla xhtml2pdf pod nazwą z CSS) oraz
+    logo zdekodowane z base64 i zapisane jako JPEG, który reportlab osadza bez
+    ponownego dekodowania obrazu.
+    """
+
+    def __init__(self):
+        self.font_name = FONT_NAME
+        self.font_uri = Path(FONT_PATH).as_uri()
+
+        # strumienie obrazów zapisujemy binarnie - kodowanie ASCII85 (w czystym Pythonie,
+        # bez rl_accel) było największym kosztem CPU renderu i powiększało PDF o ~25%
+        rl_config.useA85 = 0
+        self._register_font()
+
+        self.logo_jpeg, self.logo_size = self._prepare_logo()
+        self.logo_path = _write_file(
+            os.path.join(settings.TICKET_PDF_CACHE_DIR, ASSETS_DIRNAME),
+            f"logo-{hashlib.sha256(self.logo_jpeg).hexdigest()[:16]}.jpg",
+            self.logo_jpeg,
+        )
+        self.logo_uri = Path(self.logo_path).as_uri()
+
+    def ensure_files(self):
+        """Plik logo mógł zniknąć (ręczne czyszczenie katalogu) - zapis od nowa pod tą samą ścieżką."""
+        if not os.path.exists(self.logo_path):
+            _write_file(os.path.dirname(self.logo_path), os.path.basename(self.logo_path), self.logo_jpeg)
+
+    def _register_font(self):
+        pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
+        # brak wariantu pogrubionego w repo - <b>/<strong> korzystają z tego samego kroju
+        pdfmetrics.registerFontFamily(FONT_NAME, normal=FONT_NAME, bold=FONT_NAME, italic=FONT_NAME, boldItalic=FONT_NAME)
+
+        # xhtml2pdf kopiuje DEFAULT_FONT do każdego kontekstu - font-family: "DejaVuSans"
+        # trafia wtedy w zarejestrowany font zamiast ładować TTF przy każdym renderze
+        from xhtml2pdf import default
+
+        default.DEFAULT_FONT[FONT_NAME.lower()] = FONT_NAME
+
+    def _prepare_logo(self):
+        image = Image.open(BytesIO(base64.b64decode(LOGO_BASE64)))
+        if image.mode in ("RGBA", "LA", "P"):
+            # bilet ma białe tło, przezroczystość spłaszczamy raz tutaj
+            image = image.convert("RGBA")
+            flat = Image.new("RGB", image.size, "white")
+            flat.paste(image, mask=image.getchannel("A"))
+            image = flat
+        buf = BytesIO()
+        image.convert("RGB").save(buf, format="JPEG", quality=92)
+        return buf.getvalue(), image.size
+
+
+def _write_file(directory, name, data):
+    """Zapis atomowy (plik tymczasowy + rename), gdy pliku jeszcze nie ma. Zwraca ścieżkę."""
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return path
+
+
+_assets = None
+_assets_lock = threading.Lock()
+
+
+def get_assets():
+    global _assets
+    if _assets is None:
+        with _assets_lock:
+            if _assets is None:
+                _assets = RenderAssets()
+    _assets.ensure_files()
+    return _assets
+
+
+@lru_cache(maxsize=256)
+def qr_matrix(payload):
+    """Moduły kodu QR (True = czarny) z marginesem 2 - do rysowania wektorowego."""
+    qr = qrcode.QRCode(version=1, border=2)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    return tuple(tuple(row) for row in qr.get_matrix())
+
+
+@lru_cache(maxsize=256)
+def qr_png(payload):
+    """Surowy PNG kodu QR (mail i PDF tego samego zamówienia korzystają z jednego obrazu)."""
+    qr = qrcode.QRCode(version=1, box_size=4, border=2)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    buf = BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def qr_file(payload):
+    """
+    PNG kodu QR jako plik dla silników HTML - czytają obraz z dysku zamiast dekodować
+    data URL z base64. Dotknięcie pliku przy użyciu odsuwa go od prune.
+    """
+    digest = hashlib.sha256(payload.encode()).hexdigest()
+    directory = os.path.join(settings.TICKET_PDF_CACHE_DIR, QR_DIRNAME, digest[:2])
+    path = os.path.join(directory, f"{digest}.png")
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        _write_file(directory, f"{digest}.png", qr_png(payload))
+    return path
@@ -0,0 +1,253 @@
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from screenings.models import Screening
+from tickets.models import AuditoriumDailySales, MovieDailySales, ScreeningSales, Ticket
+
+
+logger = logging.getLogger(__name__)
+
+
+def _totals():
+    return {"tickets": 0, "seats": 0, "revenue": Decimal("0")}
+
+
+def _screening_day(screening):
+    return timezone.localdate(screening.start_time)
+
+
+def _apply(model, lookup, defaults, totals):
+    """
+    Dodaje totals do wiersza rollupu. Zwykle jeden UPDATE; przy pierwszej sprzedaży
+    wiersz z zerami powstaje przez INSERT ... ON CONFLICT DO NOTHING, więc równoległy
+    zakup, który utworzy go pierwszy, nie przerywa transakcji. Wiersza nie tworzymy
+    tylko po to, żeby go pomniejszyć - brak oznacza sprzedaż nieznaną rollupom.
+    """
+    delta = {name: F(name) + value for name, value in totals.items()}
+    rows = model.objects.filter(**lookup)
+    if rows.update(**delta):
+        return
+    if any(value < 0 for value in totals.values()):
+        logger.warning(
+            "Brak wiersza %s %s do pomniejszenia o %s - uruchom rebuild_sales_rollups",
+            model.__name__, lookup, totals,
+        )
+        return
+    model.objects.bulk_create([model(**lookup, **defaults)], ignore_conflicts=True)
+    rows.update(**delta)
+
+
+def _apply_daily(movie_id, auditorium_id, day, ticket_type_id, totals):
+    _apply(MovieDailySales, {"movie_id": movie_id, "day": day, "ticket_type_id": ticket_type_id}, {}, totals)
+    _apply(AuditoriumDailySales, {"auditorium_id": auditorium_id, "day": day, "ticket_type_id": ticket_type_id}, {}, totals)
+
+
+def record_sales(screening, lines, sign=1):
+    """
+    Dopisuje sprzedaż do rollupów seansu, filmu i sali. `lines` - krotki
+    (ticket_type_id, liczba miejsc, kwota) dla każdego biletu; sign=-1 odejmuje.
+    Wywoływane w transakcji zakupu, więc rollupy zmieniają się razem z biletami.
+    """
+    by_type = defaultdict(_totals)
+    for ticket_type_id, seats, revenue in lines:
+        totals = by_type[ticket_type_id]
+        totals["tickets"] += sign
+        totals["seats"] += sign * seats
+        totals["revenue"] += sign * Decimal(revenue)
+
+    day = _screening_day(screening)
+    for ticket_type_id, totals in by_type.items():
+        _apply(
+            ScreeningSales, {"screening_id": screening.id, "ticket_type_id": ticket_type_id}, {"day": day}, totals
+        )
+        _apply_daily(screening.movie_id, screening.auditorium_id, day, ticket_type_id, totals)
+
+
+def record_seats(ticket, seats):
+    """Zmiana liczby miejsc opłaconego biletu (Ticket.seats poza zakupem) - bez zmiany liczby biletów i kwoty."""
+    if ticket.payment_status != "PAID" or not seats:
+        return
+    screening = ticket.screening
+    totals = {"tickets": 0, "seats": seats, "revenue": Decimal("0")}
+    day = _screening_day(screening)
+    _apply(ScreeningSales, {"screening_id": screening.id, "ticket_type_id": ticket.type_id}, {"day": day}, totals)
+    _apply_daily(screening.movie_id, screening.auditorium_id, day, ticket.type_id, totals)
+
+
+def move_screening_sales(screening, movie_id, auditorium_id, day):
+    """
+    Seans zmienił dzień, film lub salę (movie_id/auditorium_id/day - poprzednie wartości):
+    jego sprzedaż przechodzi do nowych wierszy dziennych, a ScreeningSales dostaje nowy dzień,
+    więc późniejszy zwrot odejmuje od tych samych wierszy, do których sprzedaż dodano.
+    """
+    new_day = _screening_day(screening)
+    if (movie_id, auditorium_id, day) == (screening.movie_id, screening.auditorium_id, new_day):
+        return
+    rows = ScreeningSales.objects.filter(screening_id=screening.id)
+    for row in rows.values("ticket_type_id", "tickets", "seats", "revenue"):
+        totals = {name: row[name] for name in ("tickets", "seats", "revenue")}
+        _apply_daily(movie_id, auditorium_id, day, row["ticket_type_id"], {name: -value for name, value in totals.items()})
+        _apply_daily(screening.movie_id, screening.auditorium_id, new_day, row["ticket_type_id"], totals)
+    rows.update(day=new_day)
+
+
+def _paid_totals(tickets):
+    """
+    Sumy opłaconych biletów z querysetu per (seans, typ biletu) i dane tych seansów
+    (movie_id, auditorium_id, start_time) - trzy zapytania niezależnie od liczby biletów.
+    """
+    paid = tickets.filter(payment_status="PAID").order_by()
+    per_screening = defaultdict(_totals)
+    for row in paid.values("screening_id", "type_id").annotate(tickets=Count("id"), revenue=Sum("total_price")):
+        totals = per_screening[(row["screening_id"], row["type_id"])]
+        totals["tickets"] = row["tickets"]
+        totals["revenue"] = row["revenue"]
+    if not per_screening:
+        return per_screening, {}
+    for row in (
+        Ticket.seats.through.objects.filter(ticket__in=paid).order_by()
+        .values("ticket__screening_id", "ticket__type_id")
+        .annotate(seats=Count("id"))
+    ):
+        per_screening[(row["ticket__screening_id"], row["ticket__type_id"])]["seats"] = row["seats"]
+
+    screenings = {
+        s["id"]: s for s in Screening.objects.filter(id__in={key[0] for key in per_screening})
+        .values("id", "movie_id", "auditorium_id", "start_time")
+    }
+    return per_screening, screenings
+
+
+def remove_ticket_sales(tickets):
+    """Odejmuje z rollupów opłacone bilety z querysetu - przed ich usunięciem, w tej samej transakcji."""
+    per_screening, screenings = _paid_totals(tickets)
+    for (screening_id, ticket_type_id), totals in per_screening.items():
+        screening = screenings[screening_id]
+        day = timezone.localdate(screening["start_time"])
+        totals = {name: -value for name, value in totals.items()}
+        _apply(ScreeningSales, {"screening_id": screening_id, "ticket_type_id": ticket_type_id}, {"day": day}, totals)
+        _apply_daily(screening["movie_id"], screening["auditorium_id"], day, ticket_type_id, totals)
+
+
+def remove_screening_sales(screening):
+    """
+    Usuwany seans: jego wiersze ScreeningSales (usuwane kaskadowo) odejmujemy od wierszy
+    dziennych filmu i sali - jedno zapytanie plus dwa UPDATE na typ biletu, bez liczenia biletów.
+    """
+    for row in ScreeningSales.objects.filter(screening_id=screening.pk).values(
+        "ticket_type_id", "day", "tickets", "seats", "revenue"
+    ):
+        totals = {name: -row[name] for name in ("tickets", "seats", "revenue")}
+        _apply_daily(screening.movie_id, screening.auditorium_id, row["day"], row["ticket_type_id"], totals)
+
+
+@transaction.atomic
+def rebuild_sales():
+    """Przelicza wszystkie rollupy od zera z opłaconych biletów. Zwraca liczby wierszy."""
+    ScreeningSales.objects.all().delete()
+    MovieDailySales.objects.all().delete()
+    AuditoriumDailySales.objects.all().delete()
+
+    per_screening, screenings = _paid_totals(Ticket.objects.all())
+    per_movie = defaultdict(_totals)
+    per_auditorium = defaultdict(_totals)
+    screening_rows = []
+    for (screening_id, ticket_type_id), totals in per_screening.items():
+        screening = screenings[screening_id]
+        day = timezone.localdate(screening["start_time"])
+        screening_rows.append(ScreeningSales(screening_id=screening_id, ticket_type_id=ticket_type_id, day=day, **totals))
+        for rollup, key in (
+            (per_movie, (screening["movie_id"], day, ticket_type_id)),
+            (per_auditorium, (screening["auditorium_id"], day, ticket_type_id)),
+        ):
+            for name, value in totals.items():
+                rollup[key][name] += value
+
+    ScreeningSales.objects.bulk_create(screening_rows, batch_size=1000)
+    MovieDailySales.objects.bulk_create([
+        MovieDailySales(movie_id=movie_id, day=day, ticket_type_id=ticket_type_id, **totals)
+        for (movie_id, day, ticket_type_id), totals in per_movie.items()
+    ], batch_size=1000)
+    AuditoriumDailySales.objects.bulk_create([
+        AuditoriumDailySales(auditorium_id=auditorium_id, day=day, ticket_type_id=ticket_type_id, **totals)
+        for (auditorium_id, day, ticket_type_id), totals in per_auditorium.items()
+    ], batch_size=1000)
+    return {"screenings": len(screening_rows), "movie_days": len(per_movie), "auditorium_days": len(per_auditorium)}
+
+
+ROLLUP_FIELDS = ("ticket_type_id", "ticket_type__name", "tickets", "seats", "revenue")
+
+
+def _group(rows, key, columns):
+    """
+    Wiersze rollupu (jeden na typ biletu) -> jeden wpis na klucz z sumami i rozbiciem na typy.
+    key/columns - nazwa w odpowiedzi -> kolumna zapytania.
+    """
+    grouped = {}
+    for row in rows:
+        entry_key = tuple(row[column] for column in key.values())
+        entry = grouped.get(entry_key)
+        if entry is None:
+            entry = grouped[entry_key] = {name: row[column] for name, column in {**key, **columns}.items()}
+            entry.update(tickets=0, seats=0, revenue=Decimal("0"), by_type=[])
+        entry["tickets"] += row["tickets"]
+        entry["seats"] += row["seats"]
+        entry["revenue"] += row["revenue"]
+        entry["by_type"].append({
+            "ticket_type_id": row["ticket_type_id"],
+            "ticket_type": row["ticket_type__name"],
+            "tickets": row["tickets"],
+            "seats": row["seats"],
+            "revenue": str(row["revenue"]),
+        })
+    for entry in grouped.values():
+        entry["revenue"] = str(entry["revenue"])
+    return list(grouped.values())
+
+
+def _report(qs, ordering, key, columns):
+    rows = qs.order_by(*ordering, "ticket_type_id").values(*key.values(), *columns.values(), *ROLLUP_FIELDS)
+    return _group(rows, key, columns)
+
+
+def screening_report(date_from, date_to, screening_id=None, movie_id=None):
+    qs = ScreeningSales.objects.filter(day__gte=date_from, day__lte=date_to)
+    if screening_id:
+        qs = qs.filter(screening_id=screening_id)
+    if movie_id:
+        qs = qs.filter(screening__movie_id=movie_id)
+    return _report(
+        qs, ("day", "screening__start_time", "screening_id"),
+        {"screening_id": "screening_id"},
+        {
+            "day": "day",
+            "start_time": "screening__start_time",
+            "movie_id": "screening__movie_id",
+            "movie_title": "screening__movie__title",
+            "auditorium_id": "screening__auditorium_id",
+        },
+    )
+
+
+def movie_report(date_from, date_to, movie_id=None):
+    qs = MovieDailySales.objects.filter(day__gte=date_from, day__lte=date_to)
+    if movie_id:
+        qs = qs.filter(movie_id=movie_id)
+    return _report(
+        qs, ("day", "movie_id"), {"movie_id": "movie_id", "day": "day"}, {"movie_title": "movie__title"}
+    )
+
+
+def auditorium_report(date_from, date_to, auditorium_id=None):
+    qs = AuditoriumDailySales.objects.filter(day__gte=date_from, day__lte=date_to)
+    if auditorium_id:
+        qs = qs.filter(auditorium_id=auditorium_id)
+    return _report(
+        qs, ("day", "auditorium_id"),
+        {"auditorium_id": "auditorium_id", "day": "day"}, {"auditorium_name": "auditorium__name"},
+    )
@@ -0,0 +1,190 @@
+from collections import Counter
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from screenings.models import Screening
+from .models import SoldSeat, Ticket, TicketType, PromotionRule
+from .services.availability import invalidate_sold_bitmap
+from .services.promotions import invalidate_promotions
+from .services.sales import move_screening_sales, record_sales, record_seats, remove_screening_sales, remove_ticket_sales
+
+# pola biletu, od których zależy jego wkład w rollupy sprzedaży (update_fields podaje nazwy pól lub kolumn)
+SALE_FIELDS = ("screening_id", "type_id", "total_price", "payment_status")
+SALE_UPDATE_FIELDS = frozenset(SALE_FIELDS + ("screening", "type"))
+# pola seansu, od których zależą wiersze dzienne rollupów i wyceny w cache
+PLACEMENT_UPDATE_FIELDS = frozenset(("movie", "movie_id", "auditorium", "auditorium_id", "start_time"))
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_deleted(sender, instance, **kwargs):
+    # zwolnione miejsca - bitmapa seansu zostanie odbudowana przy następnym odczycie
+    screening_id = instance.screening_id
+    transaction.on_commit(lambda: invalidate_sold_bitmap(screening_id))
+
+
+@receiver(m2m_changed, sender=Ticket.seats.through)
+def ticket_seats_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Miejsca dopisane do biletu przez Ticket.seats (panel admina, skrypty) też trafiają do SoldSeat,
+    więc mapa miejsc i kontrola zakupu je widzą, a liczba miejsc opłaconego biletu - do rollupów.
+    Zakup zapisuje wszystko przez bulk_create, bez tego sygnału.
+    Zajęte już miejsce kończy się IntegrityError z unikalnego indeksu, jak przy zakupie.
+    """
+    if action == "pre_clear":
+        # po clear() nie wiadomo już, które pary zniknęły
+        instance._cleared_seats = list(
+            sender.objects.filter(**{"seat_id" if reverse else "ticket_id": instance.pk})
+            .values_list("ticket_id", "seat_id")
+        )
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if action == "post_clear":
+        pairs = instance.__dict__.pop("_cleared_seats", [])
+    elif reverse:
+        # seat.ticket_set.add(...) - instance to miejsce, pk_set to bilety
+        pairs = [(ticket_id, instance.pk) for ticket_id in pk_set]
+    else:
+        pairs = [(instance.pk, seat_id) for seat_id in pk_set]
+    if not pairs:
+        return
+
+    tickets = Ticket.objects.select_related("screening").in_bulk({ticket_id for ticket_id, _ in pairs})
+    if action == "post_add":
+        SoldSeat.objects.bulk_create([
+            SoldSeat(screening_id=tickets[ticket_id].screening_id, seat_id=seat_id, ticket_id=ticket_id)
+            for ticket_id, seat_id in pairs
+        ])
+        sign = 1
+    else:
+        removed = Q()
+        for ticket_id, seat_id in pairs:
+            removed |= Q(ticket_id=ticket_id, seat_id=seat_id)
+        SoldSeat.objects.filter(removed).delete()
+        sign = -1
+
+    seats_per_ticket = Counter(ticket_id for ticket_id, _ in pairs)
+    for ticket_id, seats in seats_per_ticket.items():
+        record_seats(tickets[ticket_id], sign * seats)
+    for screening_id in {ticket.screening_id for ticket in tickets.values()}:
+        transaction.on_commit(lambda screening_id=screening_id: invalidate_sold_bitmap(screening_id))
+
+
+def _touches(update_fields, fields):
+    # save(update_fields=...) bez żadnego z pól - poprzedniego stanu nie trzeba czytać
+    return update_fields is None or not fields.isdisjoint(update_fields)
+
+
+@receiver(pre_save, sender=Ticket)
+def remember_ticket_sale(sender, instance, update_fields=None, **kwargs):
+    if not _touches(update_fields, SALE_UPDATE_FIELDS):
+        return
+    instance._sale_before = (
+        Ticket.objects.filter(pk=instance.pk).values(*SALE_FIELDS).first() if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_sale_changed(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Bilet zmieniony w panelu (status płatności, seans, typ, cena): stary wkład w rollupy
+    odejmowany, nowy dodawany; sprzedane miejsca idą za biletem na nowy seans.
+    """
+    if not _touches(update_fields, SALE_UPDATE_FIELDS):
+        return
+    before = instance.__dict__.pop("_sale_before", None)
+    after = {field: getattr(instance, field) for field in SALE_FIELDS}
+    if before == after:
+        return
+
+    seats = 0 if created else instance.seats.count()
+    if before is not None and before["payment_status"] == "PAID":
+        screening = Screening.objects.get(pk=before["screening_id"])
+        record_sales(screening, [(before["type_id"], seats, before["total_price"])], sign=-1)
+    if instance.payment_status == "PAID":
+        record_sales(instance.screening, [(instance.type_id, seats, instance.total_price)])
+
+    if before is not None and before["screening_id"] != instance.screening_id:
+        SoldSeat.objects.filter(ticket_id=instance.pk).update(screening_id=instance.screening_id)
+        for screening_id in (before["screening_id"], instance.screening_id):
+            transaction.on_commit(lambda screening_id=screening_id: invalidate_sold_bitmap(screening_id))
+
+
+@receiver(pre_save, sender=Screening)
+def remember_screening_placement(sender, instance, update_fields=None, **kwargs):
+    if not _touches(update_fields, PLACEMENT_UPDATE_FIELDS):
+        instance._placement_before = None
+        return
+    instance._placement_before = (
+        Screening.objects.filter(pk=instance.pk).values("movie_id", "auditorium_id", "start_time").first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Screening)
+def screening_moved(sender, instance, created, **kwargs):
+    # nowy dzień, film lub sala seansu - sprzedaż w rollupach dziennych idzie za nim
+    before = getattr(instance, "_placement_before", None)
+    if before is not None:
+        move_screening_sales(
+            instance, before["movie_id"], before["auditorium_id"], timezone.localdate(before["start_time"])
+        )
+
+
+@receiver(pre_delete, sender=Ticket)
+def ticket_sale_removed(sender, instance, origin=None, **kwargs):
+    """
+    Rollupy maleją przed usunięciem, póki są jeszcze miejsca biletu. Usuwanie querysetem
+    liczy sumy raz dla całego querysetu; bilety usuwane razem z seansem pomija -
+    sprzedaż odejmuje screening_sales_removed.
+    """
+    if isinstance(origin, QuerySet):
+        if origin.model is Ticket and not getattr(origin, "_sales_removed", False):
+            origin._sales_removed = True
+            remove_ticket_sales(origin)
+    elif origin is None or isinstance(origin, Ticket):
+        remove_ticket_sales(Ticket.objects.filter(pk=instance.pk))
+
+
+@receiver(pre_delete, sender=Screening)
+def screening_sales_removed(sender, instance, **kwargs):
+    remove_screening_sales(instance)
+
+
+@receiver(post_save, sender=PromotionRule)
+@receiver(post_delete, sender=PromotionRule)
+# usunięcie seansu lub typu biletu ustawia NULL w regułach przez UPDATE, bez sygnałów reguł
+@receiver(post_delete, sender=Screening)
+@receiver(post_delete, sender=TicketType)
+def promotions_changed(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_promotions)
+
+
+@receiver(post_save, sender=Screening)
+def screening_pricing_changed(sender, instance, created, **kwargs):
+    # godzina i sala seansu wchodzą do wycen w cache (klucz zawiera wersję promocji); nowy seans nie ma jeszcze wycen
+    before = getattr(instance, "_placement_before", None)
+    if before is not None and (before["start_time"], before["auditorium_id"]) != (instance.start_time, instance.auditorium_id):
+        transaction.on_commit(invalidate_promotions)
+
+
+@receiver(pre_save, sender=TicketType)
+def remember_ticket_type_price(sender, instance, update_fields=None, **kwargs):
+    if instance.pk is None or (update_fields is not None and "price" not in update_fields):
+        instance._price_before = None
+        return
+    instance._price_before = TicketType.objects.filter(pk=instance.pk).values_list("price", flat=True).first()
+
+
+@receiver(post_save, sender=TicketType)
+def ticket_type_price_changed(sender, instance, created, **kwargs):
+    # cena typu biletu jest ceną bazową wycen w cache
+    before = instance.__dict__.pop("_price_before", None)
+    if before is not None and before != Decimal(str(instance.price)):
+        transaction.on_commit(invalidate_promotions)
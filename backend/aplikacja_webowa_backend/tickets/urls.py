@@ -1,11 +1,16 @@
 from django.urls import path
-from .views import ScreeningSeatsView, InstantPurchaseView, PromotionListView, TicketPDFView, TicketsView, CheckPromotionView
+from .views import ScreeningSeatsView, InstantPurchaseView, PromotionListView, TicketPDFView, TicketsView, CheckPromotionView, SeatHoldView, SeatHoldDetailView, BatchTicketPDFView, TicketExportView, SalesReportView
 
 urlpatterns = [
     path('screenings/<int:pk>/seats/', ScreeningSeatsView.as_view(), name='screening-seats'),
     path('purchase/', InstantPurchaseView.as_view(), name='instant-purchase'),
+    path('holds/', SeatHoldView.as_view(), name='seat-holds'),
+    path('holds/<str:token>/', SeatHoldDetailView.as_view(), name='seat-hold-detail'),
     path('promotions/', PromotionListView.as_view(), name='promotions-list'),
     path('ticket/<str:order_number>/pdf/', TicketPDFView.as_view(), name='ticket-pdf'),
+    path('pdf/batch/', BatchTicketPDFView.as_view(), name='ticket-pdf-batch'),
     path('tickets/', TicketsView.as_view(), name='tickets-list'),
+    path('tickets/export/', TicketExportView.as_view(), name='tickets-export'),
+    path('reports/sales/<str:dimension>/', SalesReportView.as_view(), name='sales-report'),
     path("check-promotion/", CheckPromotionView.as_view(), name="check-promotion"),
 ]
@@ -1,68 +1,25 @@
-import base64
 import os
+import time
 from django.utils.html import escape
-import qrcode
 from io import BytesIO
 from django.conf import settings
-from .templates.tickets.logo_base64 import LOGO_BASE64
-from xhtml2pdf import pisa
-from django.http import HttpResponse
-from django.core.mail import EmailMessage, EmailMultiAlternatives
-from django.template.loader import render_to_string
-def make_qr_data_url(payload: str) -> str:
-    qr = qrcode.QRCode(version=1, box_size=4, border=2)
-    qr.add_data(payload)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
-    buf = BytesIO()
-    img.save(buf, format='PNG')
-    b64 = base64.b64encode(buf.getvalue()).decode('ascii')
-    return f"data:image/png;base64,{b64}"
-
+from smtplib import SMTPException
+from django.core.exceptions import ImproperlyConfigured
+from .services.pdf_render import build_ticket_context, get_renderer
+from django.core.mail import EmailMultiAlternatives
+
+def order_is_recent(order_number):
+    """Czy numer zamówienia (ORD<timestamp>-<hex>) powstał w ciągu TICKET_PDF_PENDING_GRACE sekund."""
+    try:
+        created = int(order_number[3:].split("-", 1)[0])
+    except ValueError:
+        return False
+    # abs - zegary serwerów aplikacji mogą się lekko rozjeżdżać
+    return order_number.startswith("ORD") and abs(time.time() - created) <= settings.TICKET_PDF_PENDING_GRACE
 
 def generate_pdf_file(tickets,order_number,request):
-
-    first_ticket = tickets.first()
-    screening = first_ticket.screening
-
-    qr_payload = f"{order_number}"
-    qr_data_url = make_qr_data_url(qr_payload)
-
-    tickets_data = []
-    for t in tickets:
-        for seat in t.seats.all():
-            tickets_data.append({
-                "ticket_id": t.id,
-                "row_number": seat.row_number,
-                "seat_number": seat.seat_number,
-                "ticket_type": t.type.name,
-                "total_price": t.total_price,
-            })
-
-    html_string = render_to_string('tickets/ticket_pdf.html', {
-        'order_number': order_number,
-        'tickets_data': tickets_data,
-        'screening': screening,
-        'customer': {
-            'first_name': first_ticket.first_name,
-            'last_name': first_ticket.last_name,
-            'email': first_ticket.email,
-            'phone': first_ticket.phone_number,
-        },
-        'MEDIA_URL': settings.MEDIA_URL,
-        'logo_base64': LOGO_BASE64,
-        'STATIC_URL': settings.STATIC_URL,
-        'qr_data_url': qr_data_url,
-        'request': request,
-    })
-
-    pdf_buffer = BytesIO()
-    pisa_status = pisa.CreatePDF(html_string, dest=pdf_buffer)
-
-    if pisa_status.err:
-        return HttpResponse('Błąd przy generowaniu PDF', status=500)
-
-    return pdf_buffer
+    """PDF biletów zamówienia silnikiem z settings.TICKET_PDF_ENGINE; błąd silnika zgłasza PDFRenderError."""
+    return BytesIO(get_renderer().render(build_ticket_context(tickets, order_number), request))
 
 def check_if_smtp_env_ready():
 
@@ -80,10 +37,17 @@ def check_if_smtp_env_ready():
 
     return True
 
-def send_email(tickets,order_number,request,total_paid):
+def delivery_enabled():
+    # zmienne SMTP sa potrzebne tylko dla backendu smtp (locmem/console dzialaja bez nich)
+    if settings.EMAIL_BACKEND != "django.core.mail.backends.smtp.EmailBackend":
+        return True
+    return check_if_smtp_env_ready()
 
-    if not check_if_smtp_env_ready():
-        return
+def send_email(tickets,order_number,request,total_paid):
+    """Wysyła bilety zamówienia; każdy problem (brak SMTP, błąd PDF, odrzucona wiadomość) zgłasza wyjątkiem."""
+    if not delivery_enabled():
+        raise ImproperlyConfigured("Wysyłka e-mail wyłączona - brak konfiguracji SMTP")
+    tickets = list(tickets)
     pdf_buffer = generate_pdf_file(tickets,order_number,request)
 
     pdf_bytes = pdf_buffer.getvalue()
@@ -91,7 +55,7 @@ def send_email(tickets,order_number,request,total_paid):
     def e(v):
         return escape("" if v is None else str(v))
 
-    first_ticket = tickets.first()
+    first_ticket = tickets[0]
     tickets_rows_html = ""
     for t in tickets:
         for s in t.seats.all():
@@ -202,7 +166,5 @@ def send_email(tickets,order_number,request,total_paid):
         mimetype="application/pdf",
     )
 
-    msg.send(fail_silently=False)
-
-
-    pass
\ No newline at end of file
+    if not msg.send(fail_silently=False):
+        raise SMTPException(f"Wiadomość z biletami zamówienia {order_number} nie została wysłana")
\ No newline at end of file
@@ -1,101 +1,118 @@
-import uuid
+import os
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.shortcuts import get_object_or_404
 from screenings.models import Screening
-from auditorium.models import Seat
 from .models import Ticket, PromotionRule, TicketType
-from .serializers import InstantPurchaseSerializer, InstantPurchaseResponseSerializer, PromotionRuleSerializer
+from .serializers import InstantPurchaseSerializer, InstantPurchaseResponseSerializer, PromotionRuleSerializer, SeatHoldSerializer, BatchTicketPDFSerializer, SalesReportQuerySerializer
 from rest_framework.permissions import AllowAny, IsAdminUser
-from django.http import HttpResponse
-from django.template.loader import render_to_string
-from xhtml2pdf import pisa
-from io import BytesIO
+from rest_framework.utils.urls import replace_query_param
+from django.http import HttpResponse, FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.db.models import Q
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 import logging
 from django.conf import settings
-from django.template.loader import get_template
-import time
 from .filters import TicketFilter
-from .templates.tickets.logo_base64 import LOGO_BASE64
-from .services.pricing import calculate_price_with_promotion
-from .utils import make_qr_data_url, generate_pdf_file, send_email
+from .services.quote_cache import cached_quote
+from .services.availability import build_seat_map
+from .services.holds import release_hold
+from .services.pdf_cache import order_digest, get_cached_pdf, store_pdf
+from .services.pdf_render import PDFRenderError
+from .services.pdf_batch import iter_orders_zip
+from .services.sales import auditorium_report, movie_report, screening_report
+from .services.ledger import EXPORTERS, InvalidCursor, keyset_page, ledger_rows
+from .utils import generate_pdf_file, order_is_recent
 
 logger = logging.getLogger(__name__)
 
 class TicketPDFView(APIView):
     permission_classes = [AllowAny]
 
-    def get_ticket_with_retry(self, order_number, retries=5, delay=0.2):
-        for _ in range(retries):
-            tickets = Ticket.objects.filter(order_number=order_number).prefetch_related('seats', 'type')
-            if tickets.exists():
-                return tickets
-            time.sleep(delay)
-        raise Ticket.DoesNotExist
-
     def get(self, request, order_number):
-        try:
-            tickets = self.get_ticket_with_retry(order_number)
-        except Ticket.DoesNotExist:
+        tickets = list(
+            Ticket.objects.filter(order_number=order_number)
+            .select_related('screening__movie', 'screening__auditorium', 'type')
+            .prefetch_related('seats')
+        )
+        if not tickets:
+            # świeże zamówienie może jeszcze nie być widoczne - klient ponawia zamiast czekać na workerze
+            if order_is_recent(order_number):
+                response = HttpResponse(
+                    f"Bilety o numerze zamówienia {order_number} są w trakcie przygotowania",
+                    status=202
+                )
+                response['Retry-After'] = str(settings.TICKET_PDF_RETRY_AFTER)
+                return response
             return HttpResponse(
                 f"Bilety o numerze zamówienia {order_number} nie zostały znalezione",
                 status=404
             )
 
-        pdf_buffer = generate_pdf_file(tickets,order_number,request)
-
-        response = HttpResponse(
-            pdf_buffer.getvalue(),
+        # bilety zamówienia się nie zmieniają - PDF renderujemy raz i serwujemy z dysku
+        digest = order_digest(order_number, tickets)
+        path = get_cached_pdf(digest)
+        if path is None:
+            try:
+                pdf_buffer = generate_pdf_file(tickets,order_number,request)
+            except PDFRenderError:
+                logger.exception("Rendering PDF for order %s failed", order_number)
+                return HttpResponse('Błąd przy generowaniu PDF', status=500)
+            path = store_pdf(digest, pdf_buffer.getvalue())
+
+        etag = f'"{digest}"'
+        last_modified = os.path.getmtime(path)
+        not_modified = get_conditional_response(request, etag=etag, last_modified=int(last_modified))
+        if not_modified is not None:
+            return not_modified
+
+        response = FileResponse(
+            open(path, 'rb'),
+            as_attachment=True,
+            filename=f"tickets_{order_number}.pdf",
             content_type='application/pdf'
         )
-        response['Content-Disposition'] = (
-            f'attachment; filename="tickets_{order_number}.pdf"'
-        )
-
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
         return response
 
 
 
-class ScreeningSeatsView(APIView):
-    permission_classes = [AllowAny]
+class BatchTicketPDFView(APIView):
+    permission_classes = [IsAdminUser]
 
-    def get(self, request, pk):
-        screening = get_object_or_404(Screening, id=pk)
-        seats = Seat.objects.filter(auditorium=screening.auditorium)
+    def post(self, request):
+        serializer = BatchTicketPDFSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
-        sold_seat_ids = set(
-            Ticket.objects.filter(screening=screening)
-            .values_list("seats__id", flat=True)
+        response = StreamingHttpResponse(
+            iter_orders_zip(serializer.validated_data["resolved_order_numbers"]),
+            content_type='application/zip'
         )
+        response['Content-Disposition'] = f'attachment; filename="tickets_{timezone.now():%Y%m%d%H%M%S}.zip"'
+        return response
 
-        rows = {}
-        for seat in seats:
-            row_key = seat.row_number
-            if row_key not in rows:
-                rows[row_key] = []
 
-            rows[row_key].append({
-                "id": seat.id,
-                "row_number": seat.row_number,
-                "seat_number": seat.seat_number,
-                "reserved": seat.id in sold_seat_ids,
-            })
+class ScreeningSeatsView(APIView):
+    permission_classes = [AllowAny]
 
-        return Response(rows)
+    def get(self, request, pk):
+        auditorium_id = (
+            Screening.objects.filter(id=pk)
+            .values_list("auditorium_id", flat=True)
+            .first()
+        )
+        if auditorium_id is None:
+            return Response({"error": "Seans nie istnieje"}, status=status.HTTP_404_NOT_FOUND)
+
+        hold_token = request.query_params.get("hold_token")
+        return Response(build_seat_map(pk, auditorium_id, hold_token=hold_token))
 
 
 class InstantPurchaseView(APIView):
     permission_classes = [AllowAny]
 
-    def get_ticket_with_retry(self, order_number, retries=5, delay=0.2):
-        for _ in range(retries):
-            tickets = Ticket.objects.filter(order_number=order_number).prefetch_related('seats', 'type')
-            if tickets.exists():
-                return tickets
-            time.sleep(delay)
-        raise Ticket.DoesNotExist
-
     def post(self, request):
         input_serializer = InstantPurchaseSerializer(
             data=request.data,
@@ -125,37 +142,52 @@ class InstantPurchaseView(APIView):
             "total_price": total_price
         }
 
-        tickets = self.get_ticket_with_retry(group_order_number)
+        return Response(response_data, status=status.HTTP_201_CREATED)
 
-        send_email(tickets,group_order_number,request,total_price)
 
+class SeatHoldView(APIView):
+    permission_classes = [AllowAny]
 
-        return Response(response_data, status=status.HTTP_201_CREATED)
+    def post(self, request):
+        serializer = SeatHoldSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        hold = serializer.save()
+        return Response(hold, status=status.HTTP_201_CREATED)
+
+
+class SeatHoldDetailView(APIView):
+    permission_classes = [AllowAny]
+
+    def delete(self, request, token):
+        release_hold(token)
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class PromotionListView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
-        promotions = PromotionRule.objects.all()
+        now = timezone.now()
+        promotions = (
+            PromotionRule.objects
+            .filter(valid_from__lte=now, valid_to__gte=now)
+            # zagnieżdżony ScreeningReadSerializer - seans z filmem, salą i gatunkami w stałej liczbie zapytań
+            .select_related("screening__movie", "screening__auditorium", "screening__projection_type")
+            .prefetch_related("screening__movie__genres")
+            .order_by("id")
+        )
         screening_id = request.query_params.get("screening_id")
         ticket_type_id = request.query_params.get("ticket_type_id")
 
-        promotions = [p for p in promotions if p.is_active()]
-
         if screening_id:
-            try:
-                screening = Screening.objects.get(id=screening_id)
-                promotions = [p for p in promotions if not p.screening or p.screening == screening]
-            except Screening.DoesNotExist:
+            if not Screening.objects.filter(id=screening_id).exists():
                 return Response({"error": "Seans nie istnieje"}, status=status.HTTP_404_NOT_FOUND)
+            promotions = promotions.filter(Q(screening__isnull=True) | Q(screening_id=screening_id))
 
         if ticket_type_id:
-            try:
-                ticket_type = TicketType.objects.get(id=ticket_type_id)
-                promotions = [p for p in promotions if not p.ticket_type or p.ticket_type == ticket_type]
-            except TicketType.DoesNotExist:
+            if not TicketType.objects.filter(id=ticket_type_id).exists():
                 return Response({"error": "Typ biletu nie istnieje"}, status=status.HTTP_404_NOT_FOUND)
+            promotions = promotions.filter(Q(ticket_type__isnull=True) | Q(ticket_type_id=ticket_type_id))
 
         serializer = PromotionRuleSerializer(promotions, many=True)
         return Response(serializer.data)
@@ -163,50 +195,87 @@ class PromotionListView(APIView):
 
 class TicketsView(APIView):
     permission_classes = [IsAdminUser]
+    page_size = 500
+    max_page_size = 5000
+
+    def get(self, request):
+        filterset = TicketFilter(request.query_params, queryset=Ticket.objects.all())
+        rows = ledger_rows(filterset.qs)
+
+        try:
+            page_size = min(int(request.query_params.get("page_size", self.page_size)), self.max_page_size)
+        except ValueError:
+            page_size = self.page_size
+        if page_size < 1:
+            page_size = self.page_size
+
+        try:
+            results, next_cursor = keyset_page(rows, request.query_params.get("cursor"), page_size)
+        except InvalidCursor:
+            return Response({"error": "Niepoprawny kursor"}, status=status.HTTP_400_BAD_REQUEST)
+
+        next_url = None
+        if next_cursor:
+            next_url = replace_query_param(request.build_absolute_uri(), "cursor", next_cursor)
+        return Response({"next": next_url, "results": results})
+
+class TicketExportView(APIView):
+    """Cały rejestr sprzedaży z filtrami TicketFilter, jako strumień CSV albo NDJSON."""
+    permission_classes = [IsAdminUser]
 
     def get(self, request):
-        qs = Ticket.objects.all().select_related('screening__movie', 'type').prefetch_related('seats')
-        filterset = TicketFilter(request.query_params, queryset=qs)
-        qs = filterset.qs
-
-        data = []
-        for t in qs:
-            data.append({
-                'id': t.id,
-                'order_number': t.order_number,
-                'purchased_at': t.purchased_at,
-                'total_price': str(t.total_price),
-                'payment_status': t.payment_status,
-                'type': t.type.name if t.type_id else None,
-                'screening_id': t.screening_id,
-                'movie_title': getattr(getattr(t.screening, 'movie', None), 'title', None),
-                'seats_count': t.seats.count(),
-                'user_id': t.user_id,
-            })
-
-        return Response(data)
+        # "format" zajmuje negocjacja treści DRF
+        export_format = request.query_params.get("export_format", "csv")
+        if export_format not in EXPORTERS:
+            return Response(
+                {"error": f"Nieobsługiwany format: {export_format}"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        exporter, content_type, extension = EXPORTERS[export_format]
+
+        filterset = TicketFilter(request.query_params, queryset=Ticket.objects.all())
+        response = StreamingHttpResponse(exporter(ledger_rows(filterset.qs)), content_type=content_type)
+        response['Content-Disposition'] = (
+            f'attachment; filename="tickets_{timezone.now():%Y%m%d%H%M%S}.{extension}"'
+        )
+        return response
+
+class SalesReportView(APIView):
+    """Sprzedaż z tabel rollupów - jedno zapytanie po indeksie dnia, bez skanowania biletów."""
+    permission_classes = [IsAdminUser]
+    reports = {
+        "screenings": (screening_report, ("screening_id", "movie_id")),
+        "movies": (movie_report, ("movie_id",)),
+        "auditoriums": (auditorium_report, ("auditorium_id",)),
+    }
+
+    def get(self, request, dimension):
+        if dimension not in self.reports:
+            return Response({"error": "Nieznany raport"}, status=status.HTTP_404_NOT_FOUND)
+        report, filters = self.reports[dimension]
+
+        serializer = SalesReportQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        return Response(report(
+            params["date_from"], params["date_to"], **{name: params.get(name) for name in filters}
+        ))
 
 class CheckPromotionView(APIView):
     def post(self, request):
         try:
-            screening = Screening.objects.get(id=request.data["screening_id"])
-            ticket_type = TicketType.objects.get(id=request.data["ticket_type_id"])
+            screening_id = int(request.data["screening_id"])
+            ticket_type_id = int(request.data["ticket_type_id"])
             seats_data = request.data.get("seat_ids", [])
-            seats = Seat.objects.filter(
-                auditorium=screening.auditorium,
-                row_number__in=[s["row_number"] for s in seats_data],
-                seat_number__in=[s["seat_number"] for s in seats_data]
-            )
+            data, hit = cached_quote(screening_id, ticket_type_id, seats_data)
+        except (KeyError, TypeError, ValueError):
+            return Response({"error": "Niepoprawne dane"}, status=status.HTTP_400_BAD_REQUEST)
         except Screening.DoesNotExist:
             return Response({"error": "Seans nie istnieje"}, status=status.HTTP_404_NOT_FOUND)
         except TicketType.DoesNotExist:
             return Response({"error": "Typ biletu nie istnieje"}, status=status.HTTP_404_NOT_FOUND)
 
-        data = calculate_price_with_promotion(
-            seats=seats,
-            ticket_type=ticket_type,
-            screening=screening
-        )
-
-        return Response(data, status=status.HTTP_200_OK)
+        response = Response(data, status=status.HTTP_200_OK)
+        response["X-Quote-Cache"] = "hit" if hit else "miss"
+        return response
 
@@ -41,8 +41,15 @@ const DashboardPage = () => {
             }
             if (movieQuery) params.movie_query = movieQuery
             if (auditoriumId) params.auditorium_id = auditoriumId
-            const res = await api.get('/tickets/tickets/', { headers, params })
-            setTickets(Array.isArray(res.data) ? res.data : [])
+            // rejestr jest stronicowany kursorem - pobieramy kolejne strony az do konca zakresu
+            const all = []
+            let res = await api.get('/tickets/tickets/', { headers, params: { ...params, page_size: 2000 } })
+            while (true) {
+                all.push(...(res.data?.results ?? []))
+                if (!res.data?.next) break
+                res = await api.get(res.data.next, { headers })
+            }
+            setTickets(all)
         } catch (e) {
             console.error(e)
             setError('Nie udało się pobrać danych sprzedaży')
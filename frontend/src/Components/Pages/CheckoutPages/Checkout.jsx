@@ -15,7 +15,7 @@ const PROGRESS_BAR = {
 }
 
 const Checkout = () =>{
-    const {state:checkout_data,setSeats,setTickets,setStep,loadSeatMap} = useCheckout()
+    const {state:checkout_data,setSeats,setTickets,setStep,loadSeatMap,holdSelectedSeats} = useCheckout()
 
     const step = checkout_data.step;
     const seats = checkout_data.seats;
@@ -90,7 +90,7 @@ const Checkout = () =>{
 
 
                 <div style={{ display: step === 1 ? "block" : "none" }}>
-                    <SelectSeats auditorium={auditorium} seats={seats} setSeats={setSeats} setStep={setStep} loadSeatMap={loadSeatMap}/>
+                    <SelectSeats auditorium={auditorium} seats={seats} setSeats={setSeats} setStep={setStep} loadSeatMap={loadSeatMap} holdSelectedSeats={holdSelectedSeats}/>
                 </div>
 
                 <div style={{ display: step === 2 ? "block" : "none" }}>
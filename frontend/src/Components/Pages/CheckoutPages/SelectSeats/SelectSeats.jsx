@@ -6,8 +6,10 @@ import Spinner from "../../../../utils/Spinner/Spinner.jsx";
 
 
 
-const SelectSeats = ({auditorium,seats,setSeats,setStep,loadSeatMap}) =>{
+const SelectSeats = ({auditorium,seats,setSeats,setStep,loadSeatMap,holdSelectedSeats}) =>{
     const [seatMap,setSeatMap] = useState([])
+    const [errors,setErrors] = useState([])
+    const [holding,setHolding] = useState(false)
 
     useEffect(()=>{
         (async ()=>{
@@ -15,6 +17,20 @@ const SelectSeats = ({auditorium,seats,setSeats,setStep,loadSeatMap}) =>{
             setSeatMap(result)
         })()
     },[loadSeatMap])
+
+    //miejsca blokowane przed przejsciem dalej, zeby nikt ich nie kupil w trakcie wypelniania formularza
+    const handleNext = async () =>{
+        setHolding(true)
+        const holdErrors = await holdSelectedSeats()
+        setHolding(false)
+        setErrors(holdErrors)
+        if (holdErrors.length === 0){
+            setStep(2)
+        }
+        else{
+            setSeatMap(await loadSeatMap())
+        }
+    }
     return (
         <div className="checkout_auditorium__container">
             {seatMap.length === 0 && <Spinner/>}
@@ -31,7 +47,9 @@ const SelectSeats = ({auditorium,seats,setSeats,setStep,loadSeatMap}) =>{
                             <div className="checkout_auditorium__row-number">{rowNumber}</div>
                             <div className="checkout_auditorium_row_seats">
                                 {rowSeats.map((seat) => {
-                                    const {id:seat_id,row,seat_number,reserved} = seat
+                                    const {id:seat_id,row,seat_number,held} = seat
+                                    //miejsca tymczasowo zablokowane przez innych klientow tez sa niedostepne
+                                    const reserved = seat.reserved || held
                                     const id = `${seat_id}-${rowNumber}-${seat_number}`
                                     const isSelected = seats.includes(id);
                                     return (
@@ -77,10 +95,16 @@ const SelectSeats = ({auditorium,seats,setSeats,setStep,loadSeatMap}) =>{
 
             </div>
 
+            {errors.length > 0 && (
+                <div className="checkout_auditorium_errors">
+                    {errors.map((error) => <p key={error}>{error}</p>)}
+                </div>
+            )}
+
             <div className="checkout_s1_submit">
                 <button
-                    disabled={seats.length === 0}
-                    onClick={()=>setStep(2)}
+                    disabled={seats.length === 0 || holding}
+                    onClick={handleNext}
                 >Przejdź dalej</button>
             </div>
 
@@ -65,6 +65,7 @@ const Summary = () => {
 
       const payload = {
         screening_id: checkout_data.screening_id,
+        ...(checkout_data.hold_token ? { hold_token: checkout_data.hold_token } : {}),
         tickets: tickets.map((ticket) => ({
           ticket_type_id: ticket.ticketType === 'normalny' ? 1 : 2,
           seats: [
@@ -3,7 +3,7 @@
 import './CinemasProgram.css'
 import ShowTimeDateRange from "../MovieDetailsPage/ShowTimeDateRange/ShowTimeDateRange.jsx";
 import { useEffect, useState } from "react";
-import {  getScreenings } from "../../../services/movieService.js";
+import { getRepertoireDay } from "../../../services/movieService.js";
 import { Link, useNavigate } from "react-router-dom";
 import { useCheckout } from "../../../context/CheckoutContext.jsx";
 import Spinner from "../../../utils/Spinner/Spinner.jsx";
@@ -30,7 +30,7 @@ const CinemasProgram = () => {
 
         const loadScreenings = async () => {
             setLoading(true)
-            const resp = await getScreenings();
+            const resp = await getRepertoireDay(selectedDate);
 
             const data = resp.data
             const results = Array.isArray(data.results) ? data.results : data;
@@ -80,7 +80,7 @@ const CinemasProgram = () => {
 
         }
         loadScreenings()
-    }, []);
+    }, [selectedDate]);
 
     const filterScreeningsByDate = () => {
         let filtered = allScreenings.map((movie) => ({
@@ -44,7 +44,7 @@ const MovieDetailsPage = () => {
             setDirectors(data.directors);
             setDurationTime(data.duration_minutes)
 
-            const resp2 = await getScreenings();
+            const resp2 = await getScreenings({ movie_id: movieID });
 
             const results = resp2.data
 
@@ -1,7 +1,7 @@
 //context obslugujacy dane podczas procesu zakupu biletow
 
 import {createContext, useCallback, useContext, useEffect, useState} from "react";
-import {getSeatMap} from "../services/movieService.js";
+import {getSeatMap, holdSeats} from "../services/movieService.js";
 
 const CheckoutContext = createContext(null)
 
@@ -16,6 +16,7 @@ const INITIAL_FORM = {
     projection_type:null,
     auditorium:null,
     seats:[],
+    hold_token:null,
     tickets:[],
     customer: {
         first_name: "",
@@ -59,6 +60,7 @@ export const CheckoutProvider = ({children}) =>{
             projection_type,
             auditorium,
             seats: [],
+            hold_token: null,
             tickets: [],
             customer: {
                 first_name: "",
@@ -152,7 +154,8 @@ export const CheckoutProvider = ({children}) =>{
     }, [state]);
 
     const loadSeatMap = useCallback(async ()=>{
-        const resp = await getSeatMap(state.screening_id)
+        //wlasna blokada klienta nie oznacza jego miejsc jako niedostepnych
+        const resp = await getSeatMap(state.screening_id, state.hold_token)
         if (resp.status !== 200){
             return null
         }
@@ -160,9 +163,29 @@ export const CheckoutProvider = ({children}) =>{
             const data = await resp.data
             return data
         }
-    },[state.screening_id])
-
-
+    },[state.screening_id, state.hold_token])
+
+
+
+    //blokada wybranych miejsc na czas wypelniania formularza - ten sam token zastepuje poprzedni wybor
+    const holdSelectedSeats = useCallback(async ()=>{
+        try {
+            const resp = await holdSeats({
+                screening_id: state.screening_id,
+                seats: state.seats.map(id => ({
+                    row_number: Number(id.split("-")[1]),
+                    seat_number: Number(id.split("-")[2]),
+                })),
+                ...(state.hold_token ? { hold_token: state.hold_token } : {}),
+            })
+            setState(prev => ({...prev, hold_token: resp.data.hold_token}))
+            return []
+        } catch (error) {
+            const data = error.response?.data
+            const errors = Array.isArray(data) ? data : (data?.non_field_errors || [])
+            return errors.length > 0 ? errors : ["Nie udało się zarezerwować miejsc"]
+        }
+    },[state.screening_id, state.seats, state.hold_token])
 
     const value = {
         state,
@@ -174,6 +197,7 @@ export const CheckoutProvider = ({children}) =>{
         setCustomer,
         setPayment,
         loadSeatMap,
+        holdSelectedSeats,
         orderConfirmation,
         setOrderConfirmation
     }
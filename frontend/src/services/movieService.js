@@ -5,9 +5,15 @@ import { api } from "../api/client.js";
 
 export const getMovies = () => api.get("/movies/categories/")
 
-export const getScreenings = () => api.get("/screenings/list/")
+export const getScreenings = (params) => api.get("/screenings/list/", { params })
 
-export const getSeatMap = (auditorium_id) => api.get(`/tickets/screenings/${auditorium_id}/seats/`)
+export const getRepertoireDay = (day) => api.get(`/screenings/day/${day}/`)
+
+export const getSeatMap = (auditorium_id, hold_token) => api.get(`/tickets/screenings/${auditorium_id}/seats/`, {
+    params: hold_token ? { hold_token } : {}
+})
+
+export const holdSeats = (payload) => api.post("/tickets/holds/", payload)
 
 
 export const buyTicket = (payload, accessToken) =>